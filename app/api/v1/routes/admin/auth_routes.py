@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, Form, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Form, HTTPException, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.admin_model import Admin
-from app.models.token_blacklist_model import BlacklistedToken
 from app.schemas.admin_schema import AdminLogin, AdminResponse
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.schemas.response_schema import Envelope, Message, Token
+from app.core.security import create_access_token
+from app.core.hashing import hashing_executor
 from app.utils.response import success_response, error_message
 from fastapi.security import OAuth2PasswordBearer
-from app.core.deps import get_db
+from app.core.deps import get_db, get_current_admin
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import rate_limit
+from app.core.revocation import revocation_list
 import uuid, os
-from jose import JWTError,jwt
-from app.core.config import Setting
 
 router = APIRouter(prefix="/admin/auth", tags=["Admin Auth"])
 UPLOAD_DIR = "uploads/admin_profile_images"
@@ -17,38 +20,34 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/admin/auth/login")
 
-@router.post("/login")
-def admin_login(admin: AdminLogin, db: Session = Depends(get_db)):
+@router.post("/login", response_model=Envelope[Token], dependencies=[Depends(rate_limit("admin_login"))])
+async def admin_login(admin: AdminLogin, db: AsyncSession = Depends(get_db)):
     try:
-        db_admin = db.query(Admin).filter(Admin.email == admin.email).first()
-        if not db_admin or not verify_password(admin.password, db_admin.password):
+        db_admin = await db.scalar(select(Admin).where(Admin.email == admin.email))
+        if not db_admin or not await hashing_executor.verify(admin.password, db_admin.password):
             return error_message(400, "Invalid credentials")
         token = create_access_token({"sub": db_admin.email})
         return success_response("Login successful", {"access_token": token, "token_type": "bearer"})
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
 
-@router.post("/logout")
-def admin_logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+@router.post("/logout", response_model=Message)
+async def admin_logout(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     try:
-        blacklisted = BlacklistedToken(token=token)
-        db.add(blacklisted)
-        db.commit()
+        await revocation_list.revoke(db, token)
+        principal_cache.invalidate_token(token)
         return success_response("Logged out successfully")
     except Exception as e:
         return error_message(500, str(e))
 
 
-@router.get("/me")
-def admin_me(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+@router.get("/me", response_model=Envelope[AdminResponse])
+async def admin_me(current_admin: Admin = Depends(get_current_admin)):
     try:
-        payload = jwt.decode(token, Setting.SECRET_KEY, algorithms=[Setting.ALGORITHM])
-        email = payload.get("sub")
-        admin = db.query(Admin).filter(Admin.email == email).first()
-        if not admin:
-            return error_message(404, "Admin not found")
-        data = {"id": admin.id, "full_name": admin.full_name, "email": admin.email}
+        data = {"id": current_admin.id, "full_name": current_admin.full_name, "email": current_admin.email}
         return success_response("Admin profile fetched successfully", data)
     except Exception as e:
         return error_message(500, str(e))
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.author_model import Author
-from app.schemas.author_schema import AuthorResponse
+from app.models.book_model import Book
+from app.schemas.author_schema import AuthorResponse, AuthorSummary
+from app.schemas.response_schema import CursorPage, Envelope, Message
 from app.models.admin_model import Admin
 from app.core.deps import get_current_admin,get_db
 from app.utils.response import success_response, error_message
-import os
-import uuid
+from app.utils.pagination import Keyset
+from app.utils.conditional import make_etag, query_key
+from app.core.catalog_cache import cached_response, catalog_cache
+from app.services.export_service import export_response
+from app.services.image_store import add_image_variants, image_variants, release_image, store_image
+from app.services.search_service import index_books
 
 router = APIRouter(
     prefix="/admin/authors",
@@ -14,91 +22,133 @@ router = APIRouter(
     dependencies=[Depends(get_current_admin)]
 )
 
-UPLOAD_DIR = "uploads/author_images"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+AUTHOR_KEYSET = Keyset(
+    Author.id,
+    {"id": Author.id, "created_at": Author.created_at, "full_name": Author.full_name},
+    default="-created_at",
+)
 
-@router.post("/")
-def create_author(
+@router.post("/", response_model=Envelope[AuthorSummary])
+async def create_author(
     full_name: str = Form(...),
     biography: str = Form(None),
     file: UploadFile = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     try:
-        existing = db.query(Author).filter(Author.full_name == full_name).first()
+        existing = await db.scalar(select(Author.id).where(Author.full_name == full_name))
         if existing:
             return error_message(400, "Author already exists")
 
         image_path = None
         if file:
-            file_ext = os.path.splitext(file.filename)[1]
-            file_name = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, file_name).replace("\\", "/")
-            with open(file_path, "wb") as buffer:
-                buffer.write(file.file.read())
-            image_path = f"/{file_path}"
+            image_path = await store_image(db, file, "author")
 
         new_author = Author(full_name=full_name, biography=biography, image=image_path)
         db.add(new_author)
-        db.commit()
-        db.refresh(new_author)
+        await db.commit()
+        await catalog_cache.invalidate("authors")
+        await db.refresh(new_author)
 
         return success_response("Author created successfully", {
             "id": new_author.id,
             "full_name": new_author.full_name,
             "biography": new_author.biography,
-            "image": new_author.image
+            "image": new_author.image,
+            "image_variants": image_variants(new_author.image)
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
 # ✅ LIST AUTHORS
-@router.get("/")
-def list_authors(db: Session = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+@router.get("/", response_model=CursorPage[AuthorResponse])
+async def list_authors(
+    request: Request,
+    cursor: str = None,
+    limit: int = None,
+    sort: str = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
     try:
-        authors = db.query(Author).order_by(Author.created_at.desc()).all()
-        return success_response("Authors fetched successfully", [
-            {
-                "id": a.id,
-                "full_name": a.full_name,
-                "biography": a.biography,
-                "image": a.image,
-                "created_at": a.created_at,
-                "updated_at": a.updated_at
-            } for a in authors
-        ])
+        async def validate():
+            count, updated_at = (await db.execute(select(func.count(Author.id), func.max(Author.updated_at)))).one()
+            return make_etag("authors", query_key(request), count, updated_at), None
+
+        async def load():
+            stmt = select(Author.id, Author.full_name, Author.biography, Author.image, Author.created_at, Author.updated_at)
+            rows = await db.execute(AUTHOR_KEYSET.apply(stmt, sort, cursor, limit))
+            authors, meta = AUTHOR_KEYSET.page(rows.mappings(), sort, limit)
+            return success_response("Authors fetched successfully", add_image_variants(authors), meta)
+
+        return await cached_response(request, {"authors"}, validate, load)
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
-@router.get("/{author_id}")
-def get_author(author_id: int, db: Session = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+@router.get("/export")
+async def export_authors(
+    format: str = "ndjson",
+    gzip: bool = False,
+    updated_since: datetime = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    columns = (Author.id, Author.full_name, Author.biography, Author.image, Author.created_at, Author.updated_at)
+    stmt = select(*columns).order_by(Author.id)
+    if updated_since is not None:
+        stmt = stmt.where(Author.updated_at >= updated_since)
+    return export_response(db, stmt, [column.key for column in columns], format, gzip, "authors")
+
+@router.get("/{author_id}", response_model=Envelope[AuthorResponse])
+async def get_author(
+    author_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
     try:
-        author = db.query(Author).filter(Author.id == author_id).first()
-        if not author:
-            return error_message(404, "Author not found")
-        return success_response("Author fetched successfully", {
-            "id": author.id,
-            "full_name": author.full_name,
-            "biography": author.biography,
-            "image": author.image,
-            "created_at": author.created_at,
-            "updated_at": author.updated_at
-        })
+        async def validate():
+            version = (await db.execute(select(Author.updated_at).where(Author.id == author_id))).first()
+            if not version:
+                error_message(404, "Author not found")
+            return make_etag("author", author_id, version.updated_at), version.updated_at
+
+        async def load():
+            author = await db.get(Author, author_id)
+            if not author:
+                error_message(404, "Author not found")
+            return success_response("Author fetched successfully", {
+                "id": author.id,
+                "full_name": author.full_name,
+                "biography": author.biography,
+                "image": author.image,
+                "image_variants": image_variants(author.image),
+                "created_at": author.created_at,
+                "updated_at": author.updated_at
+            })
+
+        return await cached_response(request, {f"author:{author_id}"}, validate, load)
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
-@router.put("/{author_id}")
-def update_author(
+@router.put("/{author_id}", response_model=Envelope[AuthorSummary])
+async def update_author(
     author_id: int,
     full_name: str = Form(None),
     biography: str = Form(None),
     file: UploadFile = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     try:
-        author = db.query(Author).filter(Author.id == author_id).first()
+        author = await db.get(Author, author_id)
         if not author:
             return error_message(404, "Author not found")
 
@@ -107,36 +157,47 @@ def update_author(
         if biography:
             author.biography = biography
         if file:
-            file_ext = os.path.splitext(file.filename)[1]
-            file_name = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, file_name).replace("\\", "/")
-            with open(file_path, "wb") as buffer:
-                buffer.write(file.file.read())
-            author.image = f"/{file_path}"
-
-        db.commit()
-        db.refresh(author)
+            previous_image = author.image
+            author.image = await store_image(db, file, "author")
+            await release_image(db, previous_image)
+
+        if full_name:
+            # The author's name is denormalised into every one of their books' index entries
+            await db.flush()
+            await index_books(db, Book.author_id == author.id)
+        await db.commit()
+        # Book listings and search results embed the author's name
+        await catalog_cache.invalidate("authors", f"author:{author_id}", *(("books",) if full_name else ()))
+        await db.refresh(author)
         return success_response("Author updated successfully", {
             "id": author.id,
             "full_name": author.full_name,
             "biography": author.biography,
-            "image": author.image
+            "image": author.image,
+            "image_variants": image_variants(author.image)
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
-@router.delete("/{author_id}")
-def delete_author(author_id: int, db: Session = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+@router.delete("/{author_id}", response_model=Message)
+async def delete_author(author_id: int, db: AsyncSession = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
     try:
-        author = db.query(Author).filter(Author.id == author_id).first()
+        author = await db.get(Author, author_id)
         if not author:
             return error_message(404, "Author not found")
 
-        if author.image and os.path.exists(author.image.strip("/")):
-            os.remove(author.image.strip("/"))
+        await release_image(db, author.image)
 
-        db.delete(author)
-        db.commit()
+        # Deleting the author detaches their books, so collect the ids to reindex first
+        book_ids = (await db.scalars(select(Book.id).where(Book.author_id == author.id))).all()
+        await db.delete(author)
+        await db.flush()
+        if book_ids:
+            await index_books(db, Book.id.in_(book_ids))
+        await db.commit()
+        await catalog_cache.invalidate("authors", f"author:{author_id}", *(("books",) if book_ids else ()))
         return success_response("Author deleted successfully")
     except Exception as e:
         return error_message(500, str(e))
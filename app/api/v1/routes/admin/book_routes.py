@@ -1,21 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.book_model import Book
 from app.models.author_model import Author
 from app.models.genre_model import Genre
 from app.models.admin_model import Admin
 from app.core.deps import get_current_admin, get_db
 from app.utils.response import success_response, error_message
-import uuid, os
-
-UPLOAD_DIR = "uploads/book_images"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from app.utils.pagination import Keyset
+from app.utils.conditional import latest, make_etag, query_key
+from app.core.catalog_cache import cached_response, catalog_cache
+from app.schemas.book_schema import BookDetail, BookListItem, BookWriteResponse, ImportJobResponse
+from app.schemas.response_schema import CursorPage, Envelope, Message
+from app.services.catalog_service import DETAIL_COLUMNS, LIST_COLUMNS, VERSION_COLUMNS, catalog_query, catalog_versions
+from app.services.export_service import export_response
+from app.services.image_store import add_image_variants, image_variants, release_image, store_image
+from app.services.import_service import IMPORT_FORMATS, import_format, import_jobs, start_import
+from app.services.search_service import index_books, unindex_books
 
 router = APIRouter(prefix="/admin/books", tags=["Admin - Books"], dependencies=[Depends(get_current_admin)])
 
+BOOK_KEYSET = Keyset(
+    Book.id,
+    {"id": Book.id, "created_at": Book.created_at, "price": Book.price, "title": Book.title},
+    default="id",
+)
+
 
-@router.post("/")
-def create_book(
+@router.post("/", response_model=Envelope[BookWriteResponse])
+async def create_book(
     title: str = Form(...),
     author_id: int = Form(...),
     genre_id: int = Form(...),
@@ -24,23 +37,18 @@ def create_book(
     description: str = Form(...),
     is_active: bool = Form(True),
     image: UploadFile = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     try:
-        author = db.query(Author).filter(Author.id == author_id).first()
-        genre = db.query(Genre).filter(Genre.id == genre_id).first()
+        author = await db.get(Author, author_id)
+        genre = await db.get(Genre, genre_id)
         if not author or not genre:
             error_message(404, "Author or Genre not found")
 
         image_path = None
         if image:
-            file_ext = os.path.splitext(image.filename)[1]
-            file_name = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, file_name).replace("\\", "/")
-            with open(file_path, "wb") as buffer:
-                buffer.write(image.file.read())
-            image_path = f"/{file_path}"
+            image_path = await store_image(db, image, "book")
 
         new_book = Book(
             title=title,
@@ -53,8 +61,11 @@ def create_book(
             image=image_path,
         )
         db.add(new_book)
-        db.commit()
-        db.refresh(new_book)
+        await db.flush()
+        await index_books(db, Book.id == new_book.id)
+        await db.commit()
+        await catalog_cache.invalidate("books")
+        await db.refresh(new_book)
 
         return success_response("Book created successfully", {
             "id": new_book.id,
@@ -64,49 +75,143 @@ def create_book(
             "description": new_book.description,
             "is_active": new_book.is_active,
             "image": new_book.image,
+            "image_variants": image_variants(new_book.image),
             "author": author.full_name,
             "genre": genre.name
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
 
-@router.get("/")
-def list_books(db: Session = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+@router.get("/", response_model=CursorPage[BookListItem])
+async def list_books(
+    request: Request,
+    cursor: str = None,
+    limit: int = None,
+    sort: str = None,
+    genre_id: int = None,
+    author_id: int = None,
+    is_active: bool = None,
+    min_price: float = None,
+    max_price: float = None,
+    in_stock: bool = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
     try:
-        books = db.query(Book).all()
-        result = []
-        for b in books:
-            author = db.query(Author).filter(Author.id == b.author_id).first()
-            genre = db.query(Genre).filter(Genre.id == b.genre_id).first()
-            result.append({
-                "id": b.id,
-                "title": b.title,
-                "price": b.price,
-                "stock": b.stock,
-                "is_active": b.is_active,
-                "image": b.image,
-                "author": author.full_name if author else None,
-                "genre": genre.name if genre else None
-            })
-        return success_response("Books fetched successfully", result)
+        filters = []
+        if genre_id is not None:
+            filters.append(Book.genre_id == genre_id)
+        if author_id is not None:
+            filters.append(Book.author_id == author_id)
+        if is_active is not None:
+            filters.append(Book.is_active == is_active)
+        if min_price is not None:
+            filters.append(Book.price >= min_price)
+        if max_price is not None:
+            filters.append(Book.price <= max_price)
+        if in_stock is not None:
+            filters.append(Book.stock > 0 if in_stock else Book.stock <= 0)
+
+        async def validate():
+            # No Last-Modified on lists: a delete lowers the count without moving max(updated_at)
+            count, *stamps = (await db.execute(catalog_versions(*filters))).one()
+            return make_etag("books", query_key(request), count, *stamps), None
+
+        async def load():
+            stmt = catalog_query(*LIST_COLUMNS).where(*filters)
+            rows = await db.execute(BOOK_KEYSET.apply(stmt, sort, cursor, limit))
+            result, meta = BOOK_KEYSET.page(rows.mappings(), sort, limit)
+            return success_response("Books fetched successfully", add_image_variants(result), meta)
+
+        return await cached_response(request, {"books"}, validate, load)
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
 
-@router.get("/{book_id}")
-def get_book(book_id: int, db: Session = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+@router.get("/export")
+async def export_books(
+    format: str = "ndjson",
+    gzip: bool = False,
+    updated_since: datetime = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    stmt = catalog_query(*DETAIL_COLUMNS).order_by(Book.id)
+    if updated_since is not None:
+        stmt = stmt.where(Book.updated_at >= updated_since)
+    fields = [column.key for column in DETAIL_COLUMNS]
+    return export_response(db, stmt, fields, format, gzip, "books")
+
+
+@router.post("/import", status_code=202, response_model=Envelope[ImportJobResponse])
+async def import_books(
+    file: UploadFile = File(...),
+    format: str = Form(None),
+    dry_run: bool = Form(False),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Bulk-create books from a CSV or JSONL feed.
+
+    Rows need ``title``, ``author``, ``genre`` and ``price``; authors and
+    genres are matched by name and created when missing. Processing happens in
+    the background; poll ``/admin/books/import/{job_id}`` for progress and the
+    per-row error report.
+    """
+    fmt = import_format(file.filename, format)
+    if fmt not in IMPORT_FORMATS:
+        return error_message(400, "Unsupported format. Use csv or jsonl")
+    job = await start_import(file, fmt, dry_run)
+    response = success_response("Import started", job.to_dict())
+    response.status_code = 202
+    return response
+
+
+@router.get("/import/{job_id}", response_model=Envelope[ImportJobResponse])
+async def import_status(job_id: str, current_admin: Admin = Depends(get_current_admin)):
+    job = import_jobs.get(job_id)
+    if not job:
+        return error_message(404, "Import job not found")
+    return success_response("Import status fetched successfully", job.to_dict())
+
+
+@router.get("/{book_id}", response_model=Envelope[BookDetail])
+async def get_book(
+    book_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
     try:
-        book = db.query(Book).filter(Book.id == book_id).first()
-        if not book:
-            raise HTTPException(status_code=404, detail="Book not found")
-        return success_response("Book fetched successfully", book.__dict__)
+        async def validate():
+            versions = (await db.execute(catalog_query(*VERSION_COLUMNS).where(Book.id == book_id))).first()
+            if not versions:
+                error_message(404, "Book not found")
+            return make_etag("book", book_id, *versions), latest(*versions)
+
+        # The detail embeds the author and genre names, so renaming either must drop it
+        tags = {f"book:{book_id}"}
+
+        async def load():
+            book = (await db.execute(catalog_query(*DETAIL_COLUMNS).where(Book.id == book_id))).mappings().first()
+            if not book:
+                error_message(404, "Book not found")
+            tags.update((f"author:{book['author_id']}", f"genre:{book['genre_id']}"))
+            return success_response("Book fetched successfully", add_image_variants([dict(book)])[0])
+
+        return await cached_response(request, tags, validate, load)
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
 
-@router.put("/{book_id}")
-def update_book(
+@router.put("/{book_id}", response_model=Envelope[BookWriteResponse])
+async def update_book(
     book_id: int,
     title: str = Form(...),
     author_id: int = Form(...),
@@ -116,27 +221,24 @@ def update_book(
     description: str = Form(...),
     is_active: bool = Form(True),
     image: UploadFile = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
     try:
-        book = db.query(Book).filter(Book.id == book_id).first()
+        book = await db.get(Book, book_id)
         if not book:
             raise HTTPException(status_code=404, detail="Book not found")
 
-        author = db.query(Author).filter(Author.id == author_id).first()
-        genre = db.query(Genre).filter(Genre.id == genre_id).first()
+        author = await db.get(Author, author_id)
+        genre = await db.get(Genre, genre_id)
         if not author or not genre:
             error_message(404, "Author or Genre not found")
 
         # Image update
         if image:
-            file_ext = os.path.splitext(image.filename)[1]
-            file_name = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(UPLOAD_DIR, file_name).replace("\\", "/")
-            with open(file_path, "wb") as buffer:
-                buffer.write(image.file.read())
-            book.image = f"/{file_path}"
+            previous_image = book.image
+            book.image = await store_image(db, image, "book")
+            await release_image(db, previous_image)
 
         # Update fields
         book.title = title
@@ -147,8 +249,11 @@ def update_book(
         book.description = description
         book.is_active = is_active
 
-        db.commit()
-        db.refresh(book)
+        await db.flush()
+        await index_books(db, Book.id == book.id)
+        await db.commit()
+        await catalog_cache.invalidate("books", f"book:{book.id}")
+        await db.refresh(book)
 
         return success_response("Book updated successfully", {
             "id": book.id,
@@ -158,22 +263,28 @@ def update_book(
             "description": book.description,
             "is_active": book.is_active,
             "image": book.image,
+            "image_variants": image_variants(book.image),
             "author": author.full_name,
             "genre": genre.name
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
 
-@router.delete("/{book_id}")
-def delete_book(book_id: int, db: Session = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+@router.delete("/{book_id}", response_model=Message)
+async def delete_book(book_id: int, db: AsyncSession = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
     try:
-        book = db.query(Book).filter(Book.id == book_id).first()
+        book = await db.get(Book, book_id)
         if not book:
             raise HTTPException(status_code=404, detail="Book not found")
 
-        db.delete(book)
-        db.commit()
+        await unindex_books(db, [book.id])
+        await release_image(db, book.image)
+        await db.delete(book)
+        await db.commit()
+        await catalog_cache.invalidate("books", f"book:{book_id}")
         return success_response("Book deleted successfully")
     except Exception as e:
         return error_message(500, str(e))
\ No newline at end of file
@@ -1,24 +1,36 @@
 from app.models.admin_model import Admin
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.deps import get_current_admin,get_db
 from app.models.genre_model import Genre
-from app.schemas.genre_schema import GenreCreate, GenreUpdate, GenreResponse
+from app.models.book_model import Book
+from app.schemas.genre_schema import GenreCreate, GenreUpdate, GenreResponse, GenreListItem
+from app.schemas.response_schema import CursorPage, Envelope, Message
 from app.utils.response import success_response,error_message
+from app.utils.pagination import Keyset
+from app.utils.conditional import make_etag, query_key
+from app.core.catalog_cache import cached_response, catalog_cache
+from app.services.export_service import export_response
+from app.services.search_service import index_books
 
 router = APIRouter(prefix="/admin/genres", tags=["Admin - Genres"],dependencies=[Depends(get_current_admin)])
 
-@router.post("/")
-def create_genre(genre: GenreCreate, db: Session = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
+GENRE_KEYSET = Keyset(Genre.id, {"id": Genre.id, "name": Genre.name}, default="id")
+
+@router.post("/", response_model=Envelope[GenreResponse])
+async def create_genre(genre: GenreCreate, db: AsyncSession = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
     try:
-        existing_genre = db.query(Genre).filter(Genre.name == genre.name).first()
+        existing_genre = await db.scalar(select(Genre.id).where(Genre.name == genre.name))
         if existing_genre:
             raise HTTPException(status_code=400, detail="Genre with this name already exists")
 
         new_genre = Genre(**genre.dict())
         db.add(new_genre)
-        db.commit()
-        db.refresh(new_genre)
+        await db.commit()
+        await catalog_cache.invalidate("genres")
+        await db.refresh(new_genre)
         return success_response("Genre created successfully", {
             "id": new_genre.id,
             "name": new_genre.name,
@@ -27,40 +39,94 @@ def create_genre(genre: GenreCreate, db: Session = Depends(get_db),current_admin
     except Exception as e:
         return error_message(500, str(e))
 
-@router.get("/")
-def list_genres(db: Session = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
+@router.get("/", response_model=CursorPage[GenreListItem])
+async def list_genres(
+    request: Request,
+    cursor: str = None,
+    limit: int = None,
+    sort: str = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
     try:
-        genres = db.query(Genre).all()
-        return success_response("Genres fetched successfully", genres)
+        async def validate():
+            count, updated_at = (await db.execute(select(func.count(Genre.id), func.max(Genre.updated_at)))).one()
+            return make_etag("genres", query_key(request), count, updated_at), None
+
+        async def load():
+            stmt = select(Genre.id, Genre.name, Genre.description, Genre.created_at, Genre.updated_at)
+            rows = await db.execute(GENRE_KEYSET.apply(stmt, sort, cursor, limit))
+            genres, meta = GENRE_KEYSET.page(rows.mappings(), sort, limit)
+            return success_response("Genres fetched successfully", genres, meta)
+
+        return await cached_response(request, {"genres"}, validate, load)
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
-@router.get("/{genre_id}")
-def get_genre(genre_id: int, db: Session = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
+@router.get("/export")
+async def export_genres(
+    format: str = "ndjson",
+    gzip: bool = False,
+    updated_since: datetime = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    columns = (Genre.id, Genre.name, Genre.description, Genre.created_at, Genre.updated_at)
+    stmt = select(*columns).order_by(Genre.id)
+    if updated_since is not None:
+        stmt = stmt.where(Genre.updated_at >= updated_since)
+    return export_response(db, stmt, [column.key for column in columns], format, gzip, "genres")
+
+@router.get("/{genre_id}", response_model=Envelope[GenreResponse])
+async def get_genre(
+    genre_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
     try:
-        genre = db.query(Genre).filter(Genre.id == genre_id).first()
-        if not genre:
-            raise HTTPException(status_code=404, detail="Genre not found")
-        return success_response("Genre fetched successfully", {
-            "id": genre.id,
-            "name": genre.name,
-            "description": genre.description
-        })
+        async def validate():
+            version = (await db.execute(select(Genre.updated_at).where(Genre.id == genre_id))).first()
+            if not version:
+                error_message(404, "Genre not found")
+            return make_etag("genre", genre_id, version.updated_at), version.updated_at
+
+        async def load():
+            genre = await db.get(Genre, genre_id)
+            if not genre:
+                error_message(404, "Genre not found")
+            return success_response("Genre fetched successfully", {
+                "id": genre.id,
+                "name": genre.name,
+                "description": genre.description
+            })
+
+        return await cached_response(request, {f"genre:{genre_id}"}, validate, load)
+    except HTTPException:
+        raise
     except Exception as e:
         return error_message(500, str(e))
 
-@router.put("/{genre_id}")
-def update_genre(genre_id: int, genre_data: GenreUpdate, db: Session = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
+@router.put("/{genre_id}", response_model=Envelope[GenreResponse])
+async def update_genre(genre_id: int, genre_data: GenreUpdate, db: AsyncSession = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
     try:
-        genre = db.query(Genre).filter(Genre.id == genre_id).first()
+        genre = await db.get(Genre, genre_id)
         if not genre:
             raise HTTPException(status_code=404, detail="Genre not found")
 
-        for key, value in genre_data.dict(exclude_unset=True).items():
+        changes = genre_data.dict(exclude_unset=True)
+        for key, value in changes.items():
             setattr(genre, key, value)
 
-        db.commit()
-        db.refresh(genre)
+        if "name" in changes:
+            await db.flush()
+            await index_books(db, Book.genre_id == genre.id)
+        await db.commit()
+        # Book listings and search results embed the genre's name
+        await catalog_cache.invalidate("genres", f"genre:{genre_id}", *(("books",) if "name" in changes else ()))
+        await db.refresh(genre)
         return success_response("Genre updated successfully", {
             "id": genre.id,
             "name": genre.name,
@@ -69,15 +135,20 @@ def update_genre(genre_id: int, genre_data: GenreUpdate, db: Session = Depends(g
     except Exception as e:
         return error_message(500, str(e))
 
-@router.delete("/{genre_id}")
-def delete_genre(genre_id: int, db: Session = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
+@router.delete("/{genre_id}", response_model=Message)
+async def delete_genre(genre_id: int, db: AsyncSession = Depends(get_db),current_admin: Admin = Depends(get_current_admin)):
     try:
-        genre = db.query(Genre).filter(Genre.id == genre_id).first()
+        genre = await db.get(Genre, genre_id)
         if not genre:
             raise HTTPException(status_code=404, detail="Genre not found")
 
-        db.delete(genre)
-        db.commit()
+        book_ids = (await db.scalars(select(Book.id).where(Book.genre_id == genre.id))).all()
+        await db.delete(genre)
+        await db.flush()
+        if book_ids:
+            await index_books(db, Book.id.in_(book_ids))
+        await db.commit()
+        await catalog_cache.invalidate("genres", f"genre:{genre_id}", *(("books",) if book_ids else ()))
         return success_response("Genre deleted successfully")
     except Exception as e:
         return error_message(500, str(e))
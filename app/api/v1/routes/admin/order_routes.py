@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.admin_model import Admin
+from app.models.order_model import Order
+from app.core.deps import get_current_admin, get_db
+from app.services.order_service import mark_fulfilled, order_page, order_view
+from app.utils.response import success_response, error_message
+from app.schemas.order_schema import OrderResponse
+from app.schemas.response_schema import CursorPage, Envelope
+
+router = APIRouter(prefix="/admin/orders", tags=["Admin - Orders"], dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/", response_model=CursorPage[OrderResponse])
+async def list_orders(
+    cursor: str = None,
+    limit: int = None,
+    status: str = None,
+    user_id: int = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    try:
+        filters = []
+        if status is not None:
+            filters.append(Order.status == status)
+        if user_id is not None:
+            filters.append(Order.user_id == user_id)
+        orders, meta = await db.run_sync(order_page, filters, None, cursor, limit)
+        return success_response("Orders fetched successfully", orders, meta)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.get("/{order_id}", response_model=Envelope[OrderResponse])
+async def get_order(order_id: int, db: AsyncSession = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+    try:
+        order = await db.run_sync(order_view, order_id)
+        if not order:
+            return error_message(404, "Order not found")
+        return success_response("Order fetched successfully", order)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.post("/{order_id}/fulfil", response_model=Envelope[OrderResponse])
+async def fulfil_order(order_id: int, db: AsyncSession = Depends(get_db), current_admin: Admin = Depends(get_current_admin)):
+    """Mark a paid order as shipped."""
+    try:
+        fulfilled = await db.run_sync(mark_fulfilled, order_id)
+        order = await db.run_sync(order_view, order_id)
+        if not order:
+            return error_message(404, "Order not found")
+        if not fulfilled:
+            return error_message(409, f"Order is {order['status']}")
+        return success_response("Order fulfilled", order)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.catalog_cache import catalog_cache
+from app.core.deps import get_current_admin, get_db
+from app.core.rate_limit import rate_limiter
+from app.db.pool import pool_snapshot
+from app.db.session import engine, async_engine
+from app.models.email_outbox_model import OutboxEmail
+from app.services.image_variants import variant_executor
+from app.services.mail_outbox import DEAD, PENDING, outbox_sender
+from app.utils.response import success_response
+from app.schemas.response_schema import Envelope
+
+router = APIRouter(prefix="/admin/system", tags=["Admin - System"], dependencies=[Depends(get_current_admin)])
+
+
+@router.get("/db-pool", response_model=Envelope[dict])
+async def db_pool_stats():
+    data = {"sync": pool_snapshot(engine)}
+    if async_engine is not None:
+        data["async"] = pool_snapshot(async_engine.sync_engine)
+    return success_response("Pool statistics fetched successfully", data)
+
+
+
+@router.get("/cache", response_model=Envelope[dict])
+async def cache_stats():
+    return success_response("Cache statistics fetched successfully", {"catalog": catalog_cache.stats()})
+
+
+@router.get("/rate-limits", response_model=Envelope[dict])
+async def rate_limit_stats():
+    return success_response("Rate limit statistics fetched successfully", rate_limiter.stats())
+
+
+@router.get("/images", response_model=Envelope[dict])
+async def image_pipeline_stats():
+    return success_response("Image pipeline statistics fetched successfully", {"variants": variant_executor.stats()})
+
+
+@router.get("/outbox", response_model=Envelope[dict])
+async def outbox_stats(db: AsyncSession = Depends(get_db)):
+    rows = await db.execute(select(OutboxEmail.status, func.count()).group_by(OutboxEmail.status))
+    return success_response("Outbox statistics fetched successfully", {
+        "queued": {status: count for status, count in rows.all()},
+        "sender": outbox_sender.stats(),
+    })
+
+
+@router.post("/outbox/retry-dead", response_model=Envelope[dict])
+async def retry_dead_letters(db: AsyncSession = Depends(get_db)):
+    """Put dead-lettered emails back in the queue with a fresh attempt budget."""
+    result = await db.execute(
+        update(OutboxEmail)
+        .where(OutboxEmail.status == DEAD)
+        .values(status=PENDING, attempts=0, next_attempt_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    outbox_sender.wake()
+    return success_response("Dead letters requeued", {"requeued": result.rowcount})
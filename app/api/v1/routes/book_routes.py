@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User
+from app.core.deps import get_current_user, get_db
+from app.utils.response import success_response, error_message
+from app.utils.pagination import page_limit
+from app.services.image_store import add_image_variants
+from app.services.search_service import search_books
+from app.core.catalog_cache import cached_response
+from app.schemas.book_schema import BookSearchItem
+from app.schemas.response_schema import OffsetPage
+
+router = APIRouter(prefix="/books", tags=["Books"])
+
+
+@router.get("/search", response_model=OffsetPage[BookSearchItem])
+async def search(
+    request: Request,
+    q: str,
+    limit: int = None,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Relevance-ranked search over book titles, descriptions, author and genre names."""
+    try:
+        limit = page_limit(limit)
+        offset = max(offset, 0)
+
+        async def validate():
+            return None, None
+
+        async def load():
+            books = await search_books(db, q, limit, offset)
+            has_more = len(books) > limit
+            meta = {"limit": limit, "offset": offset, "next_offset": offset + limit if has_more else None}
+            return success_response("Books fetched successfully", add_image_variants(books[:limit]), meta)
+
+        return await cached_response(request, {"books"}, validate, load)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
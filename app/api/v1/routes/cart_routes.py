@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.book_model import Book
+from app.models.order_model import CartItem
+from app.models.user_model import User
+from app.core.config import Setting
+from app.core.deps import get_current_user, get_db
+from app.services.order_service import OrderError, check_quantity
+from app.utils.response import success_response, error_message
+from app.schemas.order_schema import CartItemUpdate, CartLine
+from app.schemas.response_schema import Envelope, Message
+from typing import List
+
+router = APIRouter(prefix="/cart", tags=["Cart"])
+
+
+async def _cart(db, user_id: int):
+    rows = await db.execute(
+        select(CartItem.book_id, Book.title, Book.price, Book.stock, CartItem.quantity)
+        .join(Book, Book.id == CartItem.book_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+    )
+    return [dict(row) for row in rows.mappings()]
+
+
+@router.get("/", response_model=Envelope[List[CartLine]])
+async def get_cart(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    try:
+        return success_response("Cart fetched successfully", await _cart(db, current_user.id))
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.put("/items/{book_id}", response_model=Envelope[List[CartLine]])
+async def set_cart_item(
+    book_id: int,
+    item: CartItemUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Set the quantity of a book in the cart. Stock is only reserved at checkout."""
+    try:
+        check_quantity(item.quantity)
+        if not await db.scalar(select(Book.id).where(Book.id == book_id, Book.is_active.is_(True))):
+            return error_message(404, "Book not found")
+
+        line = await db.scalar(select(CartItem).where(CartItem.user_id == current_user.id, CartItem.book_id == book_id))
+        if line:
+            line.quantity = item.quantity
+        else:
+            lines = await db.scalar(select(func.count(CartItem.id)).where(CartItem.user_id == current_user.id))
+            if lines >= Setting.ORDER_MAX_LINES:
+                return error_message(400, f"A cart can hold at most {Setting.ORDER_MAX_LINES} different books")
+            db.add(CartItem(user_id=current_user.id, book_id=book_id, quantity=item.quantity))
+        await db.commit()
+        return success_response("Cart updated successfully", await _cart(db, current_user.id))
+    except OrderError as e:
+        return error_message(e.status_code, str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.delete("/items/{book_id}", response_model=Envelope[List[CartLine]])
+async def remove_cart_item(book_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    try:
+        await db.execute(delete(CartItem).where(CartItem.user_id == current_user.id, CartItem.book_id == book_id))
+        await db.commit()
+        return success_response("Cart updated successfully", await _cart(db, current_user.id))
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.delete("/", response_model=Message)
+async def clear_cart(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    try:
+        await db.execute(delete(CartItem).where(CartItem.user_id == current_user.id))
+        await db.commit()
+        return success_response("Cart cleared successfully")
+    except Exception as e:
+        return error_message(500, str(e))
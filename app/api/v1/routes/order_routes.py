@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.order_model import Order
+from app.models.user_model import User
+from app.core.deps import get_current_user, get_db
+from app.services.order_service import (
+    CANCELLED, PAID, PENDING_PAYMENT, OrderError, cancel_intent, ensure_payment_intent, invalidate_stock,
+    order_book_ids, order_page, order_quantities, order_view, place_order, release_order, settle_payment,
+)
+from app.services.payments import SUCCEEDED, PaymentDeclined, PaymentError, payment_gateway
+from app.utils.response import success_response, error_message
+from app.schemas.order_schema import CheckoutRequest, OrderResponse, PaymentRequest
+from app.schemas.response_schema import CursorPage, Envelope
+from typing import Optional
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+@router.post("/", response_model=Envelope[OrderResponse])
+async def checkout(
+    body: CheckoutRequest = None,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Reserve stock for the listed items (or the cart) and open a payment intent.
+
+    Send an ``Idempotency-Key`` header to make retries safe: a repeated key
+    returns the order it first created. Stock is held until the order is
+    paid, cancelled, or ``ORDER_RESERVATION_SECONDS`` pass.
+    """
+    try:
+        quantities = order_quantities(body.items) if body and body.items is not None else None
+        order_id, created = await db.run_sync(place_order, current_user.id, quantities, idempotency_key)
+        if created:
+            await invalidate_stock(await db.run_sync(order_book_ids, order_id))
+        try:
+            intent = await ensure_payment_intent(db, order_id)
+        except PaymentError as e:
+            # The reservation stands; retrying with the same key opens the intent
+            return error_message(502, f"Payment provider unavailable: {e}")
+        order = await db.run_sync(order_view, order_id)
+        order["client_secret"] = intent.client_secret
+        return success_response("Order placed successfully" if created else "Order already placed", order)
+    except OrderError as e:
+        return error_message(e.status_code, str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.get("/", response_model=CursorPage[OrderResponse])
+async def list_orders(
+    cursor: str = None,
+    limit: int = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        orders, meta = await db.run_sync(order_page, [Order.user_id == current_user.id], None, cursor, limit)
+        return success_response("Orders fetched successfully", orders, meta)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.get("/{order_id}", response_model=Envelope[OrderResponse])
+async def get_order(order_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    try:
+        order = await db.run_sync(order_view, order_id, current_user.id)
+        if not order:
+            return error_message(404, "Order not found")
+        return success_response("Order fetched successfully", order)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.post("/{order_id}/pay", response_model=Envelope[OrderResponse])
+async def pay_order(
+    order_id: int,
+    payment: PaymentRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Confirm the order's payment intent with a payment method id."""
+    try:
+        order = await db.run_sync(order_view, order_id, current_user.id)
+        if not order:
+            return error_message(404, "Order not found")
+        if order["status"] != PENDING_PAYMENT:
+            return error_message(409, f"Order is {order['status']}")
+
+        try:
+            intent_id = order["payment_intent_id"] or (await ensure_payment_intent(db, order_id)).id
+            intent = await payment_gateway().confirm_intent(intent_id, payment.payment_method)
+        except PaymentDeclined as e:
+            return error_message(402, str(e))
+        except PaymentError as e:
+            return error_message(502, f"Payment provider error: {e}")
+        if intent.status != SUCCEEDED:
+            return error_message(402, f"Payment not completed: {intent.status}")
+
+        status = await settle_payment(db, order_id, intent.id)
+        if status != PAID:
+            return error_message(409, f"The reservation ran out before the payment arrived; the order is {status}")
+        return success_response("Payment received", await db.run_sync(order_view, order_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
+
+
+@router.post("/{order_id}/cancel", response_model=Envelope[OrderResponse])
+async def cancel_order(order_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """Cancel an unpaid order and put its stock back on sale."""
+    try:
+        if not await db.run_sync(release_order, order_id, CANCELLED, current_user.id):
+            order = await db.run_sync(order_view, order_id, current_user.id)
+            if not order:
+                return error_message(404, "Order not found")
+            return error_message(409, f"Order is {order['status']}")
+        order = await db.run_sync(order_view, order_id)
+        await invalidate_stock([item["book_id"] for item in order["items"]])
+        await cancel_intent(order["payment_intent_id"])
+        return success_response("Order cancelled", order)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import get_db
+from app.services.order_service import order_for_intent, settle_payment
+from app.services.payments import PaymentError, payment_gateway
+from app.utils.response import success_response, error_message
+from app.schemas.response_schema import Message
+
+router = APIRouter(prefix="/payments", tags=["Payments"])
+
+
+@router.post("/webhook", response_model=Message, include_in_schema=False)
+async def payment_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+    """Provider events. Settles orders paid without a call to ``/orders/{id}/pay``."""
+    try:
+        try:
+            event = payment_gateway().parse_webhook(await request.body(), request.headers.get("stripe-signature"))
+        except PaymentError as e:
+            return error_message(400, f"Invalid webhook: {e}")
+        if event["type"] == "payment_intent.succeeded":
+            intent_id = event["data"]["object"]["id"]
+            order_id = await db.run_sync(order_for_intent, intent_id)
+            if order_id is not None:
+                await settle_payment(db, order_id, intent_id)
+        return success_response("Event received")
+    except HTTPException:
+        raise
+    except Exception as e:
+        return error_message(500, str(e))
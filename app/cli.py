@@ -0,0 +1,110 @@
+"""Deploy-time commands, kept out of worker startup.
+
+    python -m app.cli init-db seed-admin
+    python -m app.cli check-startup --import-budget-ms 500 --create-budget-ms 1500
+    python -m app.cli reset-metrics
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from sqlalchemy import event
+from app.db.session import engine
+connections = []
+event.listen(engine, "connect", lambda *args: connections.append(1))
+app.main.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": round((imported - start) * 1000, 1),
+    "create_ms": round((created - imported) * 1000, 1),
+    "db_connections": len(connections),
+}))
+"""
+
+
+def init_db():
+    from app.main import prepare_database
+    prepare_database()
+    print("Database schema is up to date.")
+
+
+def seed_admin():
+    from app.db.seeders.seed_admin import seed_admin
+    seed_admin()
+
+
+def reset_metrics():
+    """Drop the previous workers' snapshots from ``METRICS_DIR`` before starting new ones."""
+    import glob
+    import os
+    from app.core.config import Setting
+
+    if not Setting.METRICS_DIR:
+        return
+    for path in glob.glob(os.path.join(Setting.METRICS_DIR, "*.json")):
+        os.remove(path)
+    print(f"Cleared worker metrics in {Setting.METRICS_DIR}.")
+
+
+def measure_startup(runs: int) -> dict:
+    """Best of ``runs`` cold imports of ``app.main`` and ``create_app()`` calls."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE], check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "import_ms": min(sample["import_ms"] for sample in samples),
+        "create_ms": min(sample["create_ms"] for sample in samples),
+        "db_connections": max(sample["db_connections"] for sample in samples),
+    }
+
+
+def check_startup(import_budget_ms: float, create_budget_ms: float, runs: int) -> int:
+    """Fail (exit 1) when startup is over budget or touches the database."""
+    result = measure_startup(runs)
+    failures = []
+    if result["import_ms"] > import_budget_ms:
+        failures.append(f"import took {result['import_ms']} ms, budget {import_budget_ms} ms")
+    if result["create_ms"] > create_budget_ms:
+        failures.append(f"create_app() took {result['create_ms']} ms, budget {create_budget_ms} ms")
+    if result["db_connections"]:
+        failures.append(f"startup opened {result['db_connections']} database connection(s)")
+    print(json.dumps(result))
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+
+COMMANDS = ("init-db", "seed-admin", "reset-metrics", "check-startup")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument("commands", nargs="+", choices=COMMANDS, help="run in the order given")
+    parser.add_argument("--import-budget-ms", type=float, default=500, help="check-startup: cold import budget")
+    parser.add_argument("--create-budget-ms", type=float, default=1500, help="check-startup: create_app() budget")
+    parser.add_argument("--runs", type=int, default=3, help="check-startup: best of this many runs")
+    options = parser.parse_args(argv)
+    for command in options.commands:
+        if command == "init-db":
+            init_db()
+        elif command == "seed-admin":
+            seed_admin()
+        elif command == "reset-metrics":
+            reset_metrics()
+        elif check_startup(options.import_budget_ms, options.create_budget_ms, options.runs):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
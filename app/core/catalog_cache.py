@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Response
+from app.core.config import Setting
+from app.utils.conditional import conditional_get, query_key
+
+
+class CacheBackend:
+    """Shared second tier behind the in-process LRU, e.g. Redis.
+
+    Values are JSON-compatible dicts. ``invalidate`` must drop every key that
+    was stored with any of the given tags.
+    """
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: dict, tags, ttl: int):
+        raise NotImplementedError
+
+    async def invalidate(self, tags):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """Tags are Redis sets of the keys stored under them."""
+
+    PREFIX = "papyrus:catalog:"
+
+    def __init__(self, url: str):
+        # Optional dependency, only needed when CATALOG_CACHE_URL is set
+        from redis import asyncio as aioredis
+        self.client = aioredis.from_url(url)
+
+    async def get(self, key):
+        raw = await self.client.get(self.PREFIX + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key, value, tags, ttl):
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.PREFIX + key, json.dumps(value), ex=ttl)
+            for tag in tags:
+                pipe.sadd(self.PREFIX + "tag:" + tag, key)
+                pipe.expire(self.PREFIX + "tag:" + tag, ttl)
+            await pipe.execute()
+
+    async def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self.PREFIX + "tag:" + tag
+            keys = await self.client.smembers(tag_key)
+            await self.client.delete(tag_key, *(self.PREFIX + key.decode() for key in keys))
+
+    async def close(self):
+        await self.client.close()
+
+
+class CatalogCache:
+    """Cached catalog responses, keyed by route and normalised query string.
+
+    The first tier is a bounded TTL/LRU map in this worker; an optional
+    ``CacheBackend`` is shared between workers. Every entry carries tags such
+    as ``"books"`` or ``"author:7"`` and write handlers invalidate by tag, so
+    an entry is dropped as soon as anything it was built from changes. Without
+    a shared backend other workers only see a write once their copy expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: int, backend: CacheBackend = None, local_ttl: int = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local_ttl = ttl if local_ttl is None else min(local_ttl, ttl)
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._by_tag = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a fill that raced a write is dropped
+        self.generation = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, tags, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._discard(key)
+                self.expirations += 1
+        if self.backend is not None:
+            shared = await self.backend.get(key)
+            if shared is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._store(key, shared["value"], shared["tags"])
+                return shared["value"]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def put(self, key: str, value: dict, tags, generation: int):
+        if not self.enabled or generation != self.generation:
+            return
+        self._store(key, value, tags)
+        if self.backend is not None:
+            await self.backend.set(key, {"value": value, "tags": list(tags)}, tags, self.ttl)
+
+    async def invalidate(self, *tags):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._discard(key)
+        if self.backend is not None:
+            await self.backend.invalidate(tags)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "shared_backend": type(self.backend).__name__ if self.backend else None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _store(self, key, value, tags):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, tuple(tags), time.monotonic() + self.local_ttl)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+def _backend() -> Optional[CacheBackend]:
+    if Setting.CATALOG_CACHE_URL:
+        return RedisCacheBackend(Setting.CATALOG_CACHE_URL)
+    return None
+
+
+catalog_cache = CatalogCache(
+    Setting.CATALOG_CACHE_MAXSIZE,
+    Setting.CATALOG_CACHE_TTL_SECONDS,
+    _backend(),
+    Setting.CATALOG_CACHE_LOCAL_TTL_SECONDS if Setting.CATALOG_CACHE_URL else None,
+)
+
+
+async def cached_response(request, tags, validate, load):
+    """Serve a catalog GET from the cache, keyed by path and normalised query.
+
+    On a miss ``validate()`` returns ``(etag, last_modified)`` (either may be
+    None) and ``load()`` the rendered response; ``tags`` is read after
+    ``load()`` runs, so it may add tags it learns from the rows. The rendered
+    JSON is stored with its validators, so hits need no database round trip
+    and no serialization at all, 304s included.
+    """
+    key = f"{request.url.path}?{query_key(request)}"
+    entry = await catalog_cache.get(key) if catalog_cache.enabled else None
+    if entry is not None:
+        headers = {}
+        if entry["etag"]:
+            last_modified = entry["last_modified"] and datetime.fromisoformat(entry["last_modified"])
+            not_modified, headers = conditional_get(request, entry["etag"], last_modified)
+            if not_modified:
+                return not_modified
+        return Response(entry["body"], media_type="application/json", headers=headers)
+
+    generation = catalog_cache.generation
+    etag, last_modified = await validate()
+    headers = {}
+    if etag:
+        not_modified, headers = conditional_get(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+    response = await load()
+    response.headers.update(headers)
+    entry = {
+        "etag": etag,
+        "last_modified": last_modified.isoformat() if last_modified else None,
+        "body": response.body.decode(),
+    }
+    await catalog_cache.put(key, entry, tags, generation)
+    return response
@@ -7,6 +7,49 @@ class Setting:
     PROTOCOL = os.getenv("PROTOCOL")
     APP_URL = os.getenv("APP_URL")
     DATABASE_URL = os.getenv("DATABASE_URL")
+    # Serve requests through an AsyncEngine (aiomysql / aiosqlite) instead of threadpooled sync sessions
+    DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+    # Normally run once per deploy with "python -m app.cli init-db seed-admin"; these run them in
+    # every worker's startup instead
+    DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+    SEED_ADMIN_ON_STARTUP = os.getenv("SEED_ADMIN_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    # Keep below MySQL's wait_timeout so the server never closes a pooled connection first
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "200"))
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+    # Imports running at once per worker, each holding a pooled connection; later ones wait queued
+    IMPORT_MAX_CONCURRENT = int(os.getenv("IMPORT_MAX_CONCURRENT", "2"))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    PROFILE_IMAGE_MAX_BYTES = int(os.getenv("PROFILE_IMAGE_MAX_BYTES", str(5 * 1024 * 1024)))
+    AUTHOR_IMAGE_MAX_BYTES = int(os.getenv("AUTHOR_IMAGE_MAX_BYTES", str(5 * 1024 * 1024)))
+    BOOK_IMAGE_MAX_BYTES = int(os.getenv("BOOK_IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+    IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(512 * 1024 * 1024)))
+    # Cap for request bodies on routes that take no file upload
+    REQUEST_MAX_BYTES = int(os.getenv("REQUEST_MAX_BYTES", str(1024 * 1024)))
+    # Cache lifetime for uploads that are not content-addressed; blobs are always immutable
+    UPLOADS_MAX_AGE = int(os.getenv("UPLOADS_MAX_AGE", "3600"))
+    # "x-accel" (nginx) or "x-sendfile" hands file transfer to the front server
+    UPLOADS_OFFLOAD = os.getenv("UPLOADS_OFFLOAD")
+    UPLOADS_OFFLOAD_PREFIX = os.getenv("UPLOADS_OFFLOAD_PREFIX", "/protected-uploads/")
+    # Unreferenced images are kept this long before garbage collection
+    IMAGE_GC_GRACE_SECONDS = int(os.getenv("IMAGE_GC_GRACE_SECONDS", "3600"))
+    IMAGE_GC_INTERVAL_SECONDS = int(os.getenv("IMAGE_GC_INTERVAL_SECONDS", "3600"))
+    READINESS_CACHE_SECONDS = float(os.getenv("READINESS_CACHE_SECONDS", "5"))
+    # Seconds clients may reuse a catalog response before revalidating with If-None-Match
+    CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "0"))
+    # Catalog read cache; 0 disables it. Without CATALOG_CACHE_URL (redis://...) each worker
+    # caches on its own and only sees another worker's writes once its copy expires.
+    CATALOG_CACHE_MAXSIZE = int(os.getenv("CATALOG_CACHE_MAXSIZE", "5000"))
+    CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "30"))
+    CATALOG_CACHE_URL = os.getenv("CATALOG_CACHE_URL")
+    CATALOG_CACHE_LOCAL_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_LOCAL_TTL_SECONDS", "2"))
     SECRET_KEY = os.getenv("SECRET_KEY")
     ALGORITHM = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
@@ -15,7 +58,66 @@ class Setting:
     MAIL_FROM = os.getenv("MAIL_FROM")
     MAIL_PORT = os.getenv("MAIL_PORT")
     MAIL_SERVER = os.getenv("MAIL_SERVER")
+    MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() in ("1", "true", "yes")
+    MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "false").lower() in ("1", "true", "yes")
+    MAIL_USE_CREDENTIALS = os.getenv("MAIL_USE_CREDENTIALS", "true").lower() in ("1", "true", "yes")
+    MAIL_VALIDATE_CERTS = os.getenv("MAIL_VALIDATE_CERTS", "true").lower() in ("1", "true", "yes")
+    MAIL_TIMEOUT_SECONDS = float(os.getenv("MAIL_TIMEOUT_SECONDS", "30"))
+    # "smtp", or "console" to print messages instead of sending them
+    MAIL_BACKEND = os.getenv("MAIL_BACKEND", "smtp")
+    # Idle SMTP connections are closed after this long rather than left for the server to drop
+    MAIL_IDLE_SECONDS = float(os.getenv("MAIL_IDLE_SECONDS", "60"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    # Retry delay doubles from this after every failed attempt, up to OUTBOX_BACKOFF_MAX_SECONDS
+    OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+    OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+    OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
     STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
     STRIPE_PUBLIC_KEY = os.getenv("STRIPE_PUBLIC_KEY")
+    STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+    # "stripe", or "fake" for an in-process stand-in that approves any payment (development, load tests)
+    PAYMENT_BACKEND = os.getenv("PAYMENT_BACKEND", "stripe")
+    # Simulated provider round trip for the fake backend
+    PAYMENT_FAKE_LATENCY_MS = float(os.getenv("PAYMENT_FAKE_LATENCY_MS", "0"))
+    ORDER_CURRENCY = os.getenv("ORDER_CURRENCY", "usd")
+    # Stock is held for an unpaid order this long, then returned by the expiry sweep
+    ORDER_RESERVATION_SECONDS = int(os.getenv("ORDER_RESERVATION_SECONDS", "900"))
+    ORDER_EXPIRY_INTERVAL_SECONDS = int(os.getenv("ORDER_EXPIRY_INTERVAL_SECONDS", "30"))
+    ORDER_MAX_LINES = int(os.getenv("ORDER_MAX_LINES", "50"))
+    ORDER_MAX_QUANTITY = int(os.getenv("ORDER_MAX_QUANTITY", "20"))
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Per route: comma-separated "ip:<requests>/<seconds>" and "account:<requests>/<seconds>"; empty disables
+    RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "ip:20/60,account:10/300")
+    RATE_LIMIT_ADMIN_LOGIN = os.getenv("RATE_LIMIT_ADMIN_LOGIN", "ip:10/60,account:5/300")
+    RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "ip:10/3600,account:3/3600")
+    RATE_LIMIT_FORGOT_PASSWORD = os.getenv("RATE_LIMIT_FORGOT_PASSWORD", "ip:10/3600,account:3/3600")
+    # Without RATE_LIMIT_URL (redis://...) each worker counts separately
+    RATE_LIMIT_URL = os.getenv("RATE_LIMIT_URL")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    # Number of reverse proxies in front of the app whose X-Forwarded-For can be trusted
+    RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+    AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "10000"))
+    AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    REVOCATION_REFRESH_SECONDS = int(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+    REVOCATION_COMPACT_SECONDS = int(os.getenv("REVOCATION_COMPACT_SECONDS", "3600"))
+    # Each refresh re-reads revocations this much older than the newest one seen, for late commits and clock skew
+    REVOCATION_REFRESH_OVERLAP_SECONDS = int(os.getenv("REVOCATION_REFRESH_OVERLAP_SECONDS", "60"))
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+    HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(max(HASH_WORKERS, 1) * 8)))
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+    IMAGE_MAX_PENDING = int(os.getenv("IMAGE_MAX_PENDING", "64"))
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+    ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+    # Statements slower than this are logged with the route that issued them
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Shared by all uvicorn workers on a host; unset, /metrics only covers the worker that answers
+    METRICS_DIR = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    # Bearer token the scraper sends to /metrics; unset, the endpoint is not served at all
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 Setting = Setting()
\ No newline at end of file
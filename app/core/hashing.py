@@ -0,0 +1,80 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import Setting
+from app.core.security import get_password_hash, verify_password
+from app.core.timing import timed
+
+
+class HashingExecutor:
+    """Runs bcrypt in a dedicated process pool with a bounded backlog.
+
+    bcrypt is CPU bound and holds the GIL long enough to stall the event loop
+    and starve the shared threadpool, so it gets its own processes. Once
+    ``max_pending`` calls are queued or running, new calls fail fast with 503
+    instead of piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    async def _submit(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail={"success": False, "message": "Server busy, please retry", "data": {}},
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            with timed("hash"):
+                if self.workers <= 0:
+                    return await run_in_threadpool(fn, *args)
+                return await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, password: str) -> bool:
+        return await self._submit(verify_password, plain_password, password)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+hashing_executor = HashingExecutor(Setting.HASH_WORKERS, Setting.HASH_MAX_PENDING)
@@ -0,0 +1,301 @@
+import asyncio
+import hmac
+import json
+import os
+import tempfile
+from bisect import bisect_left
+
+from starlette.concurrency import run_in_threadpool
+from app.core.config import Setting
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Label used for requests that never reached a route (404s, auth rejections in middleware),
+# so raw paths cannot blow up the number of series
+UNMATCHED = "<unmatched>"
+
+
+def route_label(scope, root_path: str = "") -> str:
+    """Route template for a handled request: ``/api/v1/books/{book_id}``, never the raw path."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        # Mounted apps (the uploads directory) only leave their prefix behind
+        return mounted[len(root_path):] + "/{path}"
+    return UNMATCHED
+
+
+class RequestMetrics:
+    """Request and upload counters for this worker.
+
+    Only updated from the event loop thread (``TimingMiddleware`` and
+    ``receive_upload``), so recording is a dict lookup, a bisect and a few
+    integer increments, with no lock.
+    """
+
+    def __init__(self):
+        self.in_progress = 0
+        self.requests = {}
+        self.latency = {}
+        self.uploads = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        series = self.latency.get((method, route))
+        if series is None:
+            series = self.latency[(method, route)] = [0.0, [0] * (len(LATENCY_BUCKETS) + 1)]
+        series[0] += seconds
+        series[1][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def observe_upload(self, kind: str, size: int):
+        totals = self.uploads.setdefault(kind, [0, 0])
+        totals[0] += 1
+        totals[1] += size
+
+
+request_metrics = RequestMetrics()
+
+
+class Families:
+    """Metric families in a JSON-friendly shape: name -> [type, help, [[suffix, labels, value], ...]]."""
+
+    def __init__(self):
+        self.data = {}
+
+    def add(self, name: str, metric_type: str, help_text: str, value, suffix: str = "", **labels):
+        family = self.data.setdefault(name, [metric_type, help_text, []])
+        family[2].append([suffix, labels, value])
+
+    def histogram(self, name: str, help_text: str, total: float, buckets, bounds, **labels):
+        running = 0
+        for bound, count in zip(bounds + ("+Inf",), buckets):
+            running += count
+            self.add(name, "histogram", help_text, running, "_bucket", **labels, le=str(bound))
+        self.add(name, "histogram", help_text, round(total, 6), "_sum", **labels)
+        self.add(name, "histogram", help_text, running, "_count", **labels)
+
+
+def _collect_pool(families: Families, engine, label: str):
+    pool = engine.pool
+    for name, method, help_text in (
+        ("papyrus_db_pool_size", "size", "Configured pool size"),
+        ("papyrus_db_pool_checked_out", "checkedout", "Connections currently checked out"),
+        ("papyrus_db_pool_overflow", "overflow", "Overflow connections currently open"),
+    ):
+        if hasattr(pool, method):
+            families.add(name, "gauge", help_text, getattr(pool, method)(), engine=label)
+    stats = getattr(pool, "stats", None)
+    if stats is None:
+        return
+    families.add("papyrus_db_pool_checkouts_total", "counter", "Connection checkouts", stats.checkouts, engine=label)
+    families.add("papyrus_db_pool_timeouts_total", "counter", "Checkouts that timed out", stats.timeouts, engine=label)
+    families.add(
+        "papyrus_db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection",
+        round(stats.wait_seconds_total, 6), engine=label,
+    )
+
+
+def scrape_authorized(authorization: str) -> bool:
+    """Whether an ``Authorization`` header carries ``METRICS_TOKEN``, compared in constant time."""
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), Setting.METRICS_TOKEN.encode())
+
+
+def collect() -> Families:
+    """Snapshot this worker's metrics. Call from the event loop.
+
+    Everything except the request and upload counters is read from the stats
+    the pools, caches and executors already keep, so it costs nothing until
+    scraped.
+    """
+    from anyio import to_thread
+    from app.core.catalog_cache import catalog_cache
+    from app.core.hashing import hashing_executor
+    from app.core.principal_cache import principal_cache
+    from app.core.rate_limit import rate_limiter
+    from app.db.session import async_engine, engine
+
+    families = Families()
+    metrics = request_metrics
+    families.add("papyrus_http_requests_in_progress", "gauge", "Requests being served", metrics.in_progress)
+    for (method, route, status), count in metrics.requests.items():
+        families.add(
+            "papyrus_http_requests_total", "counter", "Requests served, by route template",
+            count, method=method, route=route, status=status,
+        )
+    for (method, route), (total, buckets) in metrics.latency.items():
+        families.histogram(
+            "papyrus_http_request_duration_seconds", "Request latency, by route template",
+            total, buckets, LATENCY_BUCKETS, method=method, route=route,
+        )
+    for kind, (count, size) in metrics.uploads.items():
+        families.add("papyrus_uploads_total", "counter", "Accepted uploads", count, kind=kind)
+        families.add("papyrus_upload_bytes_total", "counter", "Bytes of accepted uploads", size, kind=kind)
+
+    _collect_pool(families, engine, "sync")
+    if async_engine is not None:
+        _collect_pool(families, async_engine.sync_engine, "async")
+
+    limiter = to_thread.current_default_thread_limiter()
+    families.add("papyrus_threadpool_threads_busy", "gauge", "Threadpool tokens in use", limiter.borrowed_tokens)
+    families.add("papyrus_threadpool_threads_limit", "gauge", "Threadpool size", limiter.total_tokens)
+    families.add(
+        "papyrus_threadpool_tasks_waiting", "gauge", "Calls queued for a threadpool token",
+        limiter.statistics().tasks_waiting,
+    )
+
+    hashing = hashing_executor.stats()
+    families.add("papyrus_hash_pending", "gauge", "Password hashes queued or running", hashing["pending"])
+    families.add("papyrus_hash_rejected_total", "counter", "Hashes refused with 503", hashing["rejected"])
+
+    families.add("papyrus_auth_cache_entries", "gauge", "Cached principals", len(principal_cache))
+    for result, count in (("hit", principal_cache.hits), ("miss", principal_cache.misses)):
+        families.add("papyrus_auth_cache_requests_total", "counter", "Principal cache lookups", count, result=result)
+    for result, count in (
+        ("hit", catalog_cache.hits), ("shared_hit", catalog_cache.shared_hits), ("miss", catalog_cache.misses),
+    ):
+        families.add("papyrus_catalog_cache_requests_total", "counter", "Catalog cache lookups", count, result=result)
+    for (name, scope), count in rate_limiter.rejected.items():
+        families.add(
+            "papyrus_rate_limited_total", "counter", "Requests refused with 429", count, route=name, key=scope
+        )
+    return families
+
+
+def _label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(families: dict) -> str:
+    """Prometheus text exposition format."""
+    lines = []
+    for name in sorted(families):
+        kind, help_text, samples = families[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{key}="{_label_value(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def merge(snapshots) -> dict:
+    """Sum snapshots from several workers, sample by sample.
+
+    Counters and histograms come from every snapshot, including workers that
+    have exited, so totals never go backwards. Gauges only count live workers.
+    """
+    merged, index = {}, {}
+    for snapshot, live in snapshots:
+        for name, (kind, help_text, samples) in snapshot.items():
+            if kind == "gauge" and not live:
+                continue
+            family = merged.setdefault(name, [kind, help_text, []])
+            for suffix, labels, value in samples:
+                key = (name, suffix, tuple(sorted(labels.items())))
+                position = index.get(key)
+                if position is None:
+                    index[key] = len(family[2])
+                    family[2].append([suffix, labels, value])
+                else:
+                    family[2][position][2] += value
+    return merged
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsExporter:
+    """Shares this worker's metrics with the other uvicorn workers.
+
+    With ``METRICS_DIR`` set, every worker writes its snapshot to
+    ``<dir>/<pid>.json`` every ``METRICS_FLUSH_SECONDS``, and whichever worker
+    serves ``/metrics`` adds up its own live figures and the others' files.
+    Without it the endpoint reports this process only. Clear the directory
+    before starting a new set of workers (``python -m app.cli reset-metrics``).
+    """
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self.pid = os.getpid()
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _write(self, families: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(families, f)
+        os.replace(temp_path, self._path(self.pid))
+
+    def _read_others(self):
+        snapshots = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return snapshots
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext != ".json" or not stem.isdigit() or int(stem) == self.pid:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append((json.load(f), _alive(int(stem))))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    async def flush(self, final: bool = False):
+        families = collect().data
+        if final:
+            # An exited worker contributes its totals, not its gauges
+            families = {name: family for name, family in families.items() if family[0] != "gauge"}
+        await run_in_threadpool(self._write, families)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Metrics flush failed: {e}")
+
+    def start(self):
+        self.pid = os.getpid()
+        if not self.directory:
+            return None
+        return asyncio.create_task(self.run())
+
+    async def stop(self, task):
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await self.flush(final=True)
+        except Exception as e:
+            print(f"Metrics flush failed: {e}")
+
+    async def exposition(self) -> str:
+        families = collect().data
+        if self.directory:
+            others = await run_in_threadpool(self._read_others)
+            families = merge([(families, True)] + others)
+        return render(families)
+
+
+metrics_exporter = MetricsExporter(Setting.METRICS_DIR, Setting.METRICS_FLUSH_SECONDS)
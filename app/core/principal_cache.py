@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, status
+from jose import JWTError, jwt
+from sqlalchemy import select
+from app.core.config import Setting
+from app.core.revocation import revocation_list
+from app.db.session import open_session
+from app.models.admin_model import Admin
+from app.models.user_model import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    full_name: Optional[str]
+    email: str
+    image: Optional[str]
+    is_active: Optional[bool]
+    is_verified: Optional[bool]
+
+
+@dataclass(frozen=True)
+class AdminSnapshot:
+    id: int
+    full_name: Optional[str]
+    email: str
+    is_active: Optional[bool]
+
+
+@dataclass(frozen=True)
+class Principal:
+    kind: str
+    claims: dict
+    identity: object
+    expires_at: float
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU map of bearer token -> verified principal.
+
+    Entries hold detached snapshots, never ORM instances, so they are safe to
+    share between requests and threads once the originating session is closed.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_subject = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token: str, kind: str) -> Optional[Principal]:
+        with self._lock:
+            principal = self._entries.get(token)
+            if principal is None or principal.kind != kind:
+                self.misses += 1
+                return None
+            if principal.expires_at <= time.monotonic():
+                self._discard(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def put(self, token: str, principal: Principal):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._discard(token)
+            self._entries[token] = principal
+            subject = (principal.kind, principal.identity.email)
+            self._by_subject.setdefault(subject, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_token(self, token: str):
+        with self._lock:
+            self._discard(token)
+
+    def invalidate_subject(self, kind: str, email: str):
+        with self._lock:
+            for token in list(self._by_subject.get((kind, email), ())):
+                self._discard(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_subject.clear()
+
+    def _discard(self, token: str):
+        principal = self._entries.pop(token, None)
+        if principal is None:
+            return
+        subject = (principal.kind, principal.identity.email)
+        tokens = self._by_subject.get(subject)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_subject[subject]
+
+
+principal_cache = PrincipalCache(Setting.AUTH_CACHE_MAXSIZE, Setting.AUTH_CACHE_TTL_SECONDS)
+
+
+def _unauthorized(message: str):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail={"success": False, "message": message, "data": {}}
+    )
+
+
+def _snapshot(kind: str, row):
+    if kind == "admin":
+        return AdminSnapshot(id=row.id, full_name=row.full_name, email=row.email, is_active=row.is_active)
+    return UserSnapshot(
+        id=row.id,
+        full_name=row.full_name,
+        email=row.email,
+        image=row.image,
+        is_active=row.is_active,
+        is_verified=row.is_verified,
+    )
+
+
+async def resolve_principal(token: str, kind: str, db=None) -> Principal:
+    """Return the cached principal for ``token`` or verify it against the DB.
+
+    A session is only opened on a cache miss. ``db`` may be passed in to reuse
+    a request-scoped session. Raises ``HTTPException`` with the standard error
+    envelope when the token is revoked, malformed or its subject is gone.
+    """
+    return cached_principal(token, kind) or await load_principal(token, kind, db)
+
+
+def cached_principal(token: str, kind: str) -> Optional[Principal]:
+    """Revocation check plus cache probe; never touches the DB."""
+    if revocation_list.is_revoked(token):
+        raise _unauthorized("Token has been revoked")
+    return principal_cache.get(token, kind)
+
+
+async def load_principal(token: str, kind: str, db=None) -> Principal:
+    """Cache-miss path. Callers check revocation first via ``cached_principal``."""
+    try:
+        claims = jwt.decode(token, Setting.SECRET_KEY, algorithms=[Setting.ALGORITHM])
+    except JWTError:
+        raise _unauthorized("Invalid or expired token")
+    email = claims.get("sub")
+    if not email:
+        raise _unauthorized("Invalid token payload")
+
+    model = Admin if kind == "admin" else User
+    owns_session = db is None
+    if owns_session:
+        db = open_session()
+    try:
+        row = (await db.execute(select(model).where(model.email == email))).scalars().first()
+        if not row:
+            raise _unauthorized("Admin not found" if kind == "admin" else "User not found")
+        identity = _snapshot(kind, row)
+    finally:
+        if owns_session:
+            await db.close()
+
+    expires_at = time.monotonic() + principal_cache.ttl
+    if "exp" in claims:
+        expires_at = min(expires_at, time.monotonic() + (claims["exp"] - time.time()))
+    principal = Principal(kind=kind, claims=claims, identity=identity, expires_at=expires_at)
+    principal_cache.put(token, principal)
+    return principal
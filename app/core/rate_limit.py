@@ -0,0 +1,201 @@
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+from app.core.config import Setting
+
+
+@dataclass(frozen=True)
+class Rate:
+    """``limit`` requests per ``seconds``, as a token bucket that holds ``limit`` and refills evenly."""
+
+    limit: int
+    seconds: float
+
+    @property
+    def interval(self) -> float:
+        return self.seconds / self.limit
+
+
+def parse_rules(text: str) -> dict:
+    """``"ip:20/60,account:5/300"`` -> ``{"ip": Rate(20, 60), "account": Rate(5, 300)}``."""
+    rules = {}
+    for part in filter(None, (part.strip() for part in (text or "").split(","))):
+        scope, _, rate = part.partition(":")
+        limit, _, seconds = rate.partition("/")
+        if scope not in ("ip", "account") or int(limit) <= 0 or float(seconds) <= 0:
+            raise ValueError(f"Invalid rate limit rule '{part}'")
+        rules[scope] = Rate(int(limit), float(seconds))
+    return rules
+
+
+class RateLimitStore:
+    """Keeps one "theoretical arrival time" per key (GCRA, an exact token bucket).
+
+    ``hit`` returns 0 when the request is allowed, and counts it; otherwise
+    the seconds until it would be allowed, without counting it.
+    """
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Per-worker store: a dict of key -> time, only used from the event loop, so no lock."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tat = {}
+
+    async def hit(self, key, rate):
+        now = time.monotonic()
+        tat = max(self._tat.get(key, now), now)
+        allowed_at = tat + rate.interval - rate.seconds
+        if now < allowed_at:
+            return allowed_at - now
+        if len(self._tat) >= self.max_keys and key not in self._tat:
+            self._prune(now)
+        self._tat[key] = tat + rate.interval
+        return 0.0
+
+    def _prune(self, now: float):
+        # A key whose time has passed is a full bucket, the same as no key at all
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+        while len(self._tat) >= self.max_keys:
+            del self._tat[next(iter(self._tat))]
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Shared between workers and hosts. One script call per check, timed by the Redis clock."""
+
+    PREFIX = "papyrus:ratelimit:"
+    SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local interval, window = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local allowed_at = tat + interval - window
+if now < allowed_at then return tostring(allowed_at - now) end
+redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000))
+return '0'
+"""
+
+    def __init__(self, url: str):
+        # Optional dependency, only needed when RATE_LIMIT_URL is set
+        from redis import asyncio as aioredis
+        self.client = aioredis.from_url(url)
+        self._script = self.client.register_script(self.SCRIPT)
+
+    async def hit(self, key, rate):
+        return float(await self._script(keys=[self.PREFIX + key], args=[rate.interval, rate.seconds]))
+
+    async def close(self):
+        await self.client.close()
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address, read from ``X-Forwarded-For`` only behind trusted proxies.
+
+    With ``RATE_LIMIT_TRUSTED_PROXIES`` = n the address n hops from the right
+    is used: the one the outermost trusted proxy saw. Entries further left
+    are client-supplied and could be forged.
+    """
+    hops = Setting.RATE_LIMIT_TRUSTED_PROXIES
+    forwarded = request.headers.get("x-forwarded-for") if hops > 0 else None
+    if forwarded:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[-hops] if len(addresses) >= hops else addresses[0]
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """Per-route limits keyed by client IP and by account (the email in the body).
+
+    A shared store failing open keeps the routes up when Redis is down;
+    the in-process store cannot fail.
+    """
+
+    def __init__(self, store: RateLimitStore, rules: dict):
+        self.store = store
+        self.rules = rules
+        self.allowed = 0
+        self.rejected = {}
+        self.errors = 0
+
+    async def check(self, name: str, ip: str, account: str = None):
+        """Raise 429 with ``Retry-After`` once ``ip`` or ``account`` is over the limit for ``name``."""
+        rules = self.rules.get(name)
+        if not rules:
+            return
+        keys = [("ip", ip)]
+        if account:
+            # Hashed so a shared store never holds email addresses
+            keys.append(("account", hashlib.blake2b(account.strip().lower().encode(), digest_size=12).hexdigest()))
+        for scope, value in keys:
+            rate = rules.get(scope)
+            if rate is None:
+                continue
+            try:
+                retry_after = await self.store.hit(f"{name}:{scope}:{value}", rate)
+            except Exception as e:
+                self.errors += 1
+                print("Rate limit store failed, allowing request:", str(e))
+                return
+            if retry_after > 0:
+                self.rejected[(name, scope)] = self.rejected.get((name, scope), 0) + 1
+                raise HTTPException(
+                    status_code=429,
+                    detail={"success": False, "message": "Too many requests, please retry later", "data": {}},
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+        self.allowed += 1
+
+    def stats(self):
+        return {
+            "store": type(self.store).__name__,
+            "allowed": self.allowed,
+            "rejected": {f"{name}:{scope}": count for (name, scope), count in self.rejected.items()},
+            "store_errors": self.errors,
+        }
+
+
+def _store() -> RateLimitStore:
+    if Setting.RATE_LIMIT_URL:
+        return RedisRateLimitStore(Setting.RATE_LIMIT_URL)
+    return MemoryRateLimitStore(Setting.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(_store(), {
+    name: parse_rules(text)
+    for name, text in (
+        ("login", Setting.RATE_LIMIT_LOGIN),
+        ("admin_login", Setting.RATE_LIMIT_ADMIN_LOGIN),
+        ("register", Setting.RATE_LIMIT_REGISTER),
+        ("forgot_password", Setting.RATE_LIMIT_FORGOT_PASSWORD),
+    )
+} if Setting.RATE_LIMIT_ENABLED else {})
+
+
+def rate_limit(name: str):
+    """Route dependency enforcing the ``name`` limits, before the handler does any work.
+
+    The account is the ``email`` field of the JSON body. FastAPI has already
+    buffered the body by then, so this only parses those few bytes again.
+    """
+    async def dependency(request: Request):
+        account = None
+        if name in rate_limiter.rules and "account" in rate_limiter.rules[name]:
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            if isinstance(body, dict) and isinstance(body.get("email"), str):
+                account = body["email"]
+        await rate_limiter.check(name, client_ip(request), account)
+    return dependency
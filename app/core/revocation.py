@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from jose import jwt
+from sqlalchemy import select
+from app.core.config import Setting
+from app.db.session import SessionLocal
+from app.models.token_blacklist_model import BlacklistedToken
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_expiry(token: str) -> datetime:
+    """Return the token's ``exp`` as a naive UTC datetime.
+
+    Tokens without an ``exp`` claim are kept for the default token lifetime.
+    """
+    exp = jwt.get_unverified_claims(token).get("exp")
+    if exp is None:
+        return datetime.utcnow() + timedelta(minutes=Setting.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return datetime.utcfromtimestamp(exp)
+
+
+class RevocationList:
+    """In-process mirror of ``token_blacklist`` keyed by token digest.
+
+    Lookups are a dict probe with no I/O. The mirror is refreshed incrementally
+    by ``created_at`` from the table, so logouts recorded by other workers
+    become visible within one refresh interval; logouts handled by this
+    worker are visible immediately.
+    """
+
+    def __init__(self):
+        self._expiry = {}
+        self._since = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def is_revoked(self, token: str) -> bool:
+        return token_digest(token) in self._expiry
+
+    async def revoke(self, db, token: str):
+        digest = token_digest(token)
+        expires_at = token_expiry(token)
+        if digest not in self._expiry:
+            existing = await db.execute(select(BlacklistedToken.id).where(BlacklistedToken.token_hash == digest))
+            if not existing.first():
+                db.add(BlacklistedToken(token_hash=digest, expires_at=expires_at))
+                await db.commit()
+        with self._lock:
+            self._expiry[digest] = expires_at.timestamp()
+
+    def refresh(self, db, full: bool = False):
+        """Pull rows added since the last refresh, or every live row when ``full``.
+
+        ``created_at`` is stamped before the row commits, and by the clock of
+        whichever worker wrote it, so a row can become visible after newer
+        ones were already read. Each refresh therefore re-reads the last
+        ``REVOCATION_REFRESH_OVERLAP_SECONDS`` before the newest row seen;
+        re-reading a row is harmless. Compaction also does a full reload, as
+        a backstop for anything later than that.
+        """
+        query = (
+            db.query(BlacklistedToken.token_hash, BlacklistedToken.expires_at, BlacklistedToken.created_at)
+            .filter(BlacklistedToken.expires_at > datetime.utcnow())
+        )
+        if self._since is not None and not full:
+            overlap = timedelta(seconds=Setting.REVOCATION_REFRESH_OVERLAP_SECONDS)
+            query = query.filter(BlacklistedToken.created_at >= self._since - overlap)
+        rows = query.all()
+        with self._lock:
+            for digest, expires_at, created_at in rows:
+                self._expiry[digest] = expires_at.timestamp()
+                if created_at is not None and (self._since is None or created_at > self._since):
+                    self._since = created_at
+        return len(rows)
+
+    def compact(self, db):
+        """Drop expired rows from the table and the in-process set.
+
+        An expired token is already rejected by ``jwt.decode``, so keeping its
+        revocation record around buys nothing.
+        """
+        deleted = (
+            db.query(BlacklistedToken)
+            .filter(BlacklistedToken.expires_at <= datetime.utcnow())
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        now = datetime.utcnow().timestamp()
+        with self._lock:
+            self._expiry = {digest: exp for digest, exp in self._expiry.items() if exp > now}
+        return deleted
+
+
+revocation_list = RevocationList()
+
+
+def _refresh_revocations(compact: bool):
+    db = SessionLocal()
+    try:
+        if compact:
+            revocation_list.compact(db)
+        revocation_list.refresh(db, full=compact)
+    finally:
+        db.close()
+
+
+async def run_revocation_maintenance():
+    """Background loop: refresh the revocation mirror and periodically compact."""
+    last_compact = time.monotonic()
+    while True:
+        await asyncio.sleep(Setting.REVOCATION_REFRESH_SECONDS)
+        compact = time.monotonic() - last_compact >= Setting.REVOCATION_COMPACT_SECONDS
+        try:
+            await run_in_threadpool(_refresh_revocations, compact)
+            if compact:
+                last_compact = time.monotonic()
+        except Exception as e:
+            print("Revocation refresh failed:", str(e))
+
+
+async def start_revocation_maintenance():
+    """Compact and load the mirror before serving, then keep it fresh in the background."""
+    await run_in_threadpool(_refresh_revocations, True)
+    return asyncio.create_task(run_revocation_maintenance())
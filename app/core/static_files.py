@@ -0,0 +1,224 @@
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+# Blob store paths are named by content hash (originals and their derivatives), so they never change
+CONTENT_ADDRESSED = re.compile(r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64}(?:_[a-z]+)?)\.[a-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Sidecars written next to a file at build/upload time, in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _byte_range(header: str, size: int):
+    """``(start, end)`` inclusive for a single satisfiable range, ``None`` to send the whole
+    file (absent, malformed or multi-range), or ``False`` when unsatisfiable."""
+    found = BYTE_RANGE.match(header.strip())
+    if not found:
+        return None
+    first, last = found.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    return start, end
+
+
+class FileRangeResponse(Response):
+    """``length`` bytes of the file at ``path`` from ``offset``.
+
+    Uses the ASGI zero-copy send extension when the server offers it, so the
+    kernel copies the file straight to the socket; otherwise the file is read
+    in large chunks off the event loop.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int, headers: dict,
+                 media_type: str, send_body: bool = True):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.send_body = send_body
+        self.background = None
+        self.init_headers({**headers, "Content-Length": str(length)})
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    # Truncated underneath us; end the response rather than hang the client
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadFiles(StaticFiles):
+    """Serves ``/uploads`` with long-lived caching, strong ETags and byte ranges.
+
+    Content-addressed blobs are ``immutable`` for a year; anything else gets
+    ``max_age``. A ``.br``/``.gz`` sidecar is served when the client accepts
+    it. With ``offload`` set to ``"x-accel"`` (nginx) or ``"x-sendfile"``
+    (Apache, lighttpd) only the headers are produced here and the front
+    server sends the bytes, so they never pass through a Python worker.
+    Dotfiles, such as in-flight uploads, are never served.
+    """
+
+    def __init__(self, directory: str, max_age: int = 3600, offload: str = None, offload_prefix: str = "/"):
+        super().__init__(directory=directory)
+        if offload not in (None, "", "x-accel", "x-sendfile"):
+            raise ValueError(f"Unsupported upload offload mode '{offload}'")
+        self.max_age = max_age
+        self.offload = offload or None
+        self.offload_prefix = offload_prefix.rstrip("/") + "/"
+
+    def _lookup(self, path: str, accept_encoding: str):
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+        vary = False
+        for coding, suffix in PRECOMPRESSED:
+            try:
+                sidecar = os.stat(full_path + suffix)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            vary = True
+            if accept_encoding and _accepts(accept_encoding, coding):
+                return full_path, full_path + suffix, sidecar, coding, vary
+        return full_path, full_path, stat_result, None, vary
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        if any(part.startswith(".") for part in path.split(os.sep)):
+            raise HTTPException(status_code=404)
+        request_headers = Headers(scope=scope)
+        found = await anyio.to_thread.run_sync(self._lookup, path, request_headers.get("accept-encoding", ""))
+        if found is None:
+            raise HTTPException(status_code=404)
+        full_path, served_path, stat_result, encoding, vary = found
+
+        root = os.path.realpath(self.directory)
+        relative = os.path.relpath(served_path, root).replace(os.sep, "/")
+        immutable = CONTENT_ADDRESSED.match(os.path.relpath(full_path, root).replace(os.sep, "/"))
+        suffix = f"-{encoding}" if encoding else ""
+        if immutable:
+            etag = f'"{immutable.group(1)}{suffix}"'
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}{suffix}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "Cache-Control": IMMUTABLE if immutable else f"public, max-age={self.max_age}",
+            "Accept-Ranges": "bytes",
+        }
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if vary:
+            headers["Vary"] = "Accept-Encoding"
+
+        if self._not_modified(request_headers, etag, stat_result.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        media_type = guess_type(full_path)[0] or "application/octet-stream"
+        if self.offload == "x-accel":
+            # nginx answers ranges and conditionals itself for the internal location
+            headers["X-Accel-Redirect"] = self.offload_prefix + relative
+            return Response(status_code=200, headers=headers, media_type=media_type)
+        if self.offload == "x-sendfile":
+            headers["X-Sendfile"] = os.path.abspath(served_path)
+            return Response(status_code=200, headers=headers, media_type=media_type)
+
+        size = stat_result.st_size
+        byte_range = None
+        if "range" in request_headers and self._range_applies(request_headers.get("if-range"), etag):
+            byte_range = _byte_range(request_headers["range"], size)
+        if byte_range is False:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        send_body = scope["method"] == "GET"
+        if byte_range is None:
+            return FileRangeResponse(served_path, 0, size, 200, headers, media_type, send_body)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return FileRangeResponse(served_path, start, end - start + 1, 206, headers, media_type, send_body)
+
+    @staticmethod
+    def _not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _range_applies(if_range: str, etag: str) -> bool:
+        # If-Range needs a strong match; a date validator is not accepted, so the full file is sent
+        return if_range is None or if_range.strip() == etag
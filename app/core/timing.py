@@ -0,0 +1,186 @@
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import event
+from app.core.config import Setting
+from app.core.metrics import request_metrics, route_label
+
+_current = ContextVar("request_timings", default=None)
+
+
+def _logger(name: str, level: int) -> logging.Logger:
+    # One JSON object per line on stdout, independent of how uvicorn configures logging
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    return logger
+
+
+access_log = _logger("papyrus.access", logging.INFO)
+slow_query_log = _logger("papyrus.slow_query", logging.WARNING)
+
+
+class RequestTimings:
+    """Time spent in the database and other named phases while serving one request.
+
+    Shared by the request's task and any threadpool work it starts (context
+    variables are copied into ``run_in_threadpool``), hence the lock.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+    def add_query(self, elapsed_ms: float):
+        with self._lock:
+            self.db_queries += 1
+            self.db_ms += elapsed_ms
+
+    def add(self, phase: str, elapsed_ms: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + elapsed_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        metrics = [f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"']
+        metrics.extend(f"{phase};dur={ms:.1f}" for phase, ms in self.phases.items())
+        metrics.append(f"app;dur={self.elapsed_ms():.1f}")
+        return ", ".join(metrics)
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the time spent in the block to ``phase`` of the current request, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, (time.perf_counter() - started) * 1000)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    timings = _current.get()
+    if timings is not None:
+        timings.add_query(elapsed_ms)
+    if elapsed_ms >= Setting.SLOW_QUERY_MS:
+        # Parameters are left out: they may hold credentials or personal data
+        slow_query_log.warning(json.dumps({
+            "ts": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+            "event": "slow_query",
+            "duration_ms": round(elapsed_ms, 1),
+            "route": timings.route if timings is not None else None,
+            "method": timings.scope.get("method") if timings is not None else None,
+            "statement": " ".join(statement.split())[:2000],
+        }))
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """Count and time every statement ``engine`` runs (pass ``AsyncEngine.sync_engine`` for async)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware that sets up per-request accounting.
+
+    Adds a ``Server-Timing`` header (database time and query count, any
+    ``timed`` phases such as hashing, uploads and rendering, and the total),
+    writes one JSON access-log line per request and feeds the ``/metrics``
+    request counters. Sits outermost so the authentication lookups are
+    counted too.
+
+    The header goes out with the response start, so it is left off
+    responses without a ``Content-Length``: a ``StreamingResponse`` such as
+    the catalog export still runs its queries after that point and would
+    report only the work done before the first byte. The access log and
+    metrics are written at the end and always have the full totals.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings(scope)
+        token = _current.set(timings)
+        status = 500
+        root_path = scope.get("root_path", "")
+        request_metrics.in_progress += 1
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = message.get("headers", [])
+                if Setting.SERVER_TIMING and any(name.lower() == b"content-length" for name, _ in headers):
+                    headers = [*headers, (b"server-timing", timings.server_timing().encode("latin-1"))]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            request_metrics.in_progress -= 1
+            if Setting.METRICS_ENABLED:
+                request_metrics.observe(
+                    scope["method"], route_label(scope, root_path), status, timings.elapsed_ms() / 1000
+                )
+            if Setting.ACCESS_LOG:
+                client = scope.get("client")
+                access_log.info(json.dumps({
+                    "ts": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": timings.route,
+                    "status": status,
+                    "duration_ms": round(timings.elapsed_ms(), 1),
+                    "db_queries": timings.db_queries,
+                    "db_ms": round(timings.db_ms, 1),
+                    **{f"{phase}_ms": round(ms, 1) for phase, ms in timings.phases.items()},
+                    "client": client[0] if client else None,
+                }))
@@ -1,4 +1,7 @@
 from app.db.session import Base
 from app.models.user_model import User
 from app.models.token_blacklist_model import BlacklistedToken
-from app.models.admin_model import Admin
\ No newline at end of file
+from app.models.admin_model import Admin
+from app.models.image_blob_model import ImageBlob
+from app.models.email_outbox_model import OutboxEmail
+from app.models.order_model import CartItem, Order, OrderItem
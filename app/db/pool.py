@@ -0,0 +1,137 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds, in milliseconds, of the checkout latency histogram buckets
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    """Checkout counters and latency histogram for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+
+    def record(self, seconds: float, timed_out: bool = False):
+        index = bisect_left(CHECKOUT_BUCKETS_MS, seconds * 1000)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.buckets[index] += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            # Cumulative, like Prometheus "le" buckets
+            histogram, running = {}, 0
+            for bound, count in zip(CHECKOUT_BUCKETS_MS + ("inf",), self.buckets):
+                running += count
+                histogram[f"le_{bound}ms" if bound != "inf" else "le_inf"] = running
+            return {
+                "pool": pool.status(),
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "checkout_latency_histogram": histogram,
+            }
+
+
+class _InstrumentedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, setting, asyncio: bool = False) -> dict:
+    """Engine keyword arguments for the pool settings in ``Setting``.
+
+    In-memory SQLite keeps SQLAlchemy's default single-connection pool, since a
+    second connection would see a different, empty database.
+    """
+    options = {"pool_pre_ping": setting.DB_POOL_PRE_PING}
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if asyncio else InstrumentedQueuePool,
+        pool_size=setting.DB_POOL_SIZE,
+        max_overflow=setting.DB_MAX_OVERFLOW,
+        pool_timeout=setting.DB_POOL_TIMEOUT,
+        pool_recycle=setting.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def pool_snapshot(engine):
+    pool = engine.pool
+    stats = getattr(pool, "stats", None)
+    if stats is None:
+        return {"pool": pool.status()}
+    return stats.snapshot(pool)
+
+
+class ReadinessProbe:
+    """Caches the result of a trivial round trip for ``ttl`` seconds.
+
+    Health checks hit ``/`` far more often than the database can change state,
+    so only one caller per window pays for the query.
+    """
+
+    def __init__(self, engine, ttl: float):
+        self.engine = engine
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._result = None
+
+    def check(self):
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl:
+                return self._result
+            try:
+                with self.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                version = self.engine.dialect.server_version_info
+                self._result = (True, ".".join(str(part) for part in version) if version else None)
+            except Exception as e:
+                self._result = (False, str(e))
+            self._checked_at = time.monotonic()
+            return self._result
@@ -1,8 +1,99 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import Setting
+from app.db.pool import ReadinessProbe, pool_options
 
-engine= create_engine(Setting.DATABASE_URL)
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+engine= create_engine(Setting.DATABASE_URL, **pool_options(Setting.DATABASE_URL, Setting))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False,bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# The sync engine above stays around for seeding, schema creation and background
+# jobs; request handlers go through open_session() and work in either mode.
+async_engine = None
+AsyncSessionLocal = None
+if Setting.DB_ASYNC:
+    async_url = Setting.ASYNC_DATABASE_URL or async_database_url(Setting.DATABASE_URL)
+    async_engine = create_async_engine(async_url, **pool_options(async_url, Setting, asyncio=True))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+readiness_probe = ReadinessProbe(engine, Setting.READINESS_CACHE_SECONDS)
+
+
+class ThreadedSession:
+    """Awaitable facade over a sync ``Session`` used when ``DB_ASYNC`` is off.
+
+    Mirrors the subset of the ``AsyncSession`` API the handlers use, so route
+    code is written once with ``await db.execute(...)`` and each blocking call
+    is pushed to the threadpool instead of running on the event loop.
+    """
+
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, *args, **kwargs):
+        def _execute():
+            result = self.sync_session.execute(statement, *args, **kwargs)
+            if getattr(statement, "is_dml", False):
+                return result
+            # Buffer rows in the worker thread, as AsyncSession.execute does
+            return result.freeze()()
+        return await run_in_threadpool(_execute)
+
+    async def scalars(self, statement, *args, **kwargs):
+        return (await self.execute(statement, *args, **kwargs)).scalars()
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def refresh(self, instance, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def flush(self, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.flush, *args, **kwargs)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+def open_session():
+    """Return an ``AsyncSession`` or a ``ThreadedSession`` depending on ``DB_ASYNC``."""
+    if AsyncSessionLocal is not None:
+        return AsyncSessionLocal()
+    return ThreadedSession(SessionLocal(expire_on_commit=False))
@@ -0,0 +1,76 @@
+"""In-place schema changes that ``create_all`` cannot make.
+
+``create_all`` only creates missing tables, so a table that changed shape
+since a database was first created is brought up to date here. Every step
+checks the live schema first and does nothing on a fresh or already
+current database, so ``python -m app.cli init-db`` is safe on every deploy.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, inspect, insert, text
+from app.db.session import engine
+
+
+def _migrate_token_blacklist(connection):
+    """Replace the raw ``token`` column with ``token_hash`` and ``expires_at``.
+
+    The old rows are rewritten as digests with their ``exp`` claim; rows
+    whose token has expired or cannot be parsed are dropped, since
+    ``jwt.decode`` rejects those tokens anyway.
+    """
+    from app.core.revocation import token_digest, token_expiry
+    from app.models.token_blacklist_model import BlacklistedToken
+
+    inspector = inspect(connection)
+    if not inspector.has_table("token_blacklist"):
+        return
+    if "token_hash" in {column["name"] for column in inspector.get_columns("token_blacklist")}:
+        return
+
+    now = datetime.utcnow()
+    revoked = {}
+    for token, created_at in connection.execute(
+        text("SELECT token, created_at FROM token_blacklist").columns(created_at=DateTime)
+    ).all():
+        try:
+            expires_at = token_expiry(token)
+        except Exception:
+            continue
+        if token and expires_at > now:
+            revoked[token_digest(token)] = {"expires_at": expires_at, "created_at": created_at or now}
+
+    connection.execute(text("DROP TABLE token_blacklist"))
+    BlacklistedToken.__table__.create(connection)
+    if revoked:
+        connection.execute(
+            insert(BlacklistedToken), [{"token_hash": digest, **values} for digest, values in revoked.items()]
+        )
+    print(f"Migrated token_blacklist: kept {len(revoked)} unexpired revocation(s).")
+
+
+def upgrade_schema():
+    """Run before ``create_all``, which then creates whatever is still missing."""
+    with engine.begin() as connection:
+        _migrate_token_blacklist(connection)
+
+
+def create_missing_indexes(metadata) -> int:
+    """Create every index declared on ``metadata`` that an existing table lacks.
+
+    Run after ``create_all``. Tables it just created already have their
+    indexes; older ones get those added later, such as the composite keyset
+    indexes the paginated list endpoints sort by. On a large table an index
+    build takes a while, which is why it happens here at deploy time and not
+    at worker startup.
+    """
+    created = 0
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+                    print(f"Created index {index.name} on {table.name}.")
+                    created += 1
+    return created
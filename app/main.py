@@ -1,25 +1,11 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.core.middleware import auth_middleware
-from fastapi.openapi.utils import get_openapi
-from fastapi.staticfiles import StaticFiles
-from app.api.v1.routes import auth_routes
-from app.api.v1.routes.admin import auth_routes as admin_auth_routes
-from app.api.v1.routes.admin import genre_routes as admin_genre_routes
-from app.api.v1.routes.admin import author_routes as admin_author_routes
-from app.api.v1.routes.admin import book_routes as admin_book_routes
-from app.db.session import engine
-from app.db import base
-from app.core.admin_middleware import admin_auth_middleware
-from app.db.seeders.seed_admin import seed_admin
-from sqlalchemy import create_engine, text
-
-base.Base.metadata.create_all(bind=engine)
-seed_admin()
-
-app = FastAPI(
-    title="Papyrus API",
-    description="""
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.config import Setting
+
+DESCRIPTION = """
     Papyrus API Documentation
 
     This API powers the Papyrus Book Store App.
@@ -29,65 +15,198 @@ app = FastAPI(
     - Profile management
     - Secure token-based authentication (JWT)
     - Admin and user role segregation
-    """,
-    version="1.0.0",
-    contact={
-        "name": "Papyrus Dev Team",
-        "url": "https://github.com/ArhamAzeem/Papyrus",
-        "email": "arhamazeem318@gmail.com",
-    },
-    license_info={
-        "name": "MIT License",
-    },
-)
-
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.middleware("http")(auth_middleware)
-app.middleware("http")(admin_auth_middleware)
-
-app.include_router(auth_routes.router, prefix="/api/v1")
-
-app.include_router(admin_auth_routes.router, prefix="/api/v1")
-app.include_router(admin_genre_routes.router, prefix="/api/v1")
-app.include_router(admin_author_routes.router, prefix="/api/v1")
-app.include_router(admin_book_routes.router, prefix="/api/v1")
-
-def custom_openapi():
-    if app.openapi_schema:
-        return app.openapi_schema
-    openapi_schema = get_openapi(
+    """
+
+
+def prepare_database():
+    """Upgrade changed tables, then create missing tables, indexes and the search index (``python -m app.cli init-db``)."""
+    from app.db import base
+    from app.db.session import engine
+    from app.db.upgrade import create_missing_indexes, upgrade_schema
+    from app.services.search_service import ensure_search_index
+
+    upgrade_schema()
+    base.Base.metadata.create_all(bind=engine)
+    create_missing_indexes(base.Base.metadata)
+    ensure_search_index()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opt-in schema and seed steps, then the per-worker background tasks.
+
+    Schema creation and seeding are normally run once per deploy with
+    ``python -m app.cli``, not in every worker on every boot.
+    """
+    from app.core.catalog_cache import catalog_cache
+    from app.core.hashing import hashing_executor
+    from app.core.metrics import metrics_exporter
+    from app.core.rate_limit import rate_limiter
+    from app.core.revocation import start_revocation_maintenance
+    from app.db.session import async_engine
+    from app.services.image_store import start_image_gc
+    from app.services.image_variants import variant_executor
+    from app.services.mail_outbox import outbox_sender
+    from app.services.order_service import start_order_expiry
+
+    if Setting.DB_INIT_ON_STARTUP:
+        await run_in_threadpool(prepare_database)
+    if Setting.SEED_ADMIN_ON_STARTUP:
+        from app.db.seeders.seed_admin import seed_admin
+        await run_in_threadpool(seed_admin)
+
+    app.state.revocation_task = await start_revocation_maintenance()
+    app.state.image_gc_task = start_image_gc()
+    app.state.outbox_task = outbox_sender.start()
+    app.state.order_expiry_task = start_order_expiry()
+    app.state.metrics_task = metrics_exporter.start() if Setting.METRICS_ENABLED else None
+    try:
+        yield
+    finally:
+        await metrics_exporter.stop(app.state.metrics_task)
+        app.state.revocation_task.cancel()
+        app.state.image_gc_task.cancel()
+        app.state.outbox_task.cancel()
+        app.state.order_expiry_task.cancel()
+        await outbox_sender.backend.close()
+        hashing_executor.shutdown()
+        variant_executor.shutdown()
+        if catalog_cache.backend is not None:
+            await catalog_cache.backend.close()
+        await rate_limiter.store.close()
+        if async_engine is not None:
+            await async_engine.dispose()
+
+
+def create_app() -> FastAPI:
+    """Build the application. Touches no database, so workers start serving immediately."""
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.openapi.utils import get_openapi
+    from fastapi.responses import Response
+    from app.api.v1.routes import auth_routes
+    from app.api.v1.routes import book_routes
+    from app.api.v1.routes import cart_routes
+    from app.api.v1.routes import order_routes
+    from app.api.v1.routes import payment_routes
+    from app.api.v1.routes.admin import auth_routes as admin_auth_routes
+    from app.api.v1.routes.admin import genre_routes as admin_genre_routes
+    from app.api.v1.routes.admin import author_routes as admin_author_routes
+    from app.api.v1.routes.admin import book_routes as admin_book_routes
+    from app.api.v1.routes.admin import system_routes as admin_system_routes
+    from app.api.v1.routes.admin import order_routes as admin_order_routes
+    from app.core.middleware import AuthMiddleware, BodyLimitMiddleware
+    from app.core.static_files import UploadFiles
+    from app.core.timing import TimingMiddleware, instrument_engine
+    from app.db.session import async_engine, engine, readiness_probe
+
+    app = FastAPI(
         title="Papyrus API",
+        description=DESCRIPTION,
         version="1.0.0",
-        description="Papyrus Book Store API with authentication and admin routes.",
-        routes=app.routes,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+        contact={
+            "name": "Papyrus Dev Team",
+            "url": "https://github.com/ArhamAzeem/Papyrus",
+            "email": "arhamazeem318@gmail.com",
+        },
+        license_info={
+            "name": "MIT License",
+        },
+    )
+
+    app.mount(
+        "/uploads",
+        UploadFiles(
+            directory="uploads",
+            max_age=Setting.UPLOADS_MAX_AGE,
+            offload=Setting.UPLOADS_OFFLOAD,
+            offload_prefix=Setting.UPLOADS_OFFLOAD_PREFIX,
+        ),
+        name="uploads",
     )
-    openapi_schema["components"]["securitySchemes"] = {
-        "BearerAuth": {
-            "type": "http",
-            "scheme": "bearer",
-            "bearerFormat": "JWT",
+
+    app.add_middleware(AuthMiddleware)
+    app.add_middleware(BodyLimitMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Server-Timing"],
+    )
+    # Outermost, so the queries the auth middleware makes are counted too
+    app.add_middleware(TimingMiddleware)
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+
+    app.include_router(auth_routes.router, prefix="/api/v1")
+    app.include_router(book_routes.router, prefix="/api/v1")
+    app.include_router(cart_routes.router, prefix="/api/v1")
+    app.include_router(order_routes.router, prefix="/api/v1")
+    app.include_router(payment_routes.router, prefix="/api/v1")
+
+    app.include_router(admin_auth_routes.router, prefix="/api/v1")
+    app.include_router(admin_genre_routes.router, prefix="/api/v1")
+    app.include_router(admin_author_routes.router, prefix="/api/v1")
+    app.include_router(admin_book_routes.router, prefix="/api/v1")
+    app.include_router(admin_system_routes.router, prefix="/api/v1")
+    app.include_router(admin_order_routes.router, prefix="/api/v1")
+
+    def custom_openapi():
+        if app.openapi_schema:
+            return app.openapi_schema
+        openapi_schema = get_openapi(
+            title="Papyrus API",
+            version="1.0.0",
+            description="Papyrus Book Store API with authentication and admin routes.",
+            routes=app.routes,
+        )
+        openapi_schema["components"]["securitySchemes"] = {
+            "BearerAuth": {
+                "type": "http",
+                "scheme": "bearer",
+                "bearerFormat": "JWT",
+            }
         }
-    }
-    for path in openapi_schema["paths"].values():
-        for method in path.values():
-            method["security"] = [{"BearerAuth": []}]
-    app.openapi_schema = openapi_schema
-    return app.openapi_schema
+        for path in openapi_schema["paths"].values():
+            for method in path.values():
+                method["security"] = [{"BearerAuth": []}]
+        app.openapi_schema = openapi_schema
+        return app.openapi_schema
+
+    app.openapi = custom_openapi
+
+    @app.get("/")
+    def read_root():
+        ok, detail = readiness_probe.check()
+        if not ok:
+            return JSONResponse(status_code=503, content={"message": "Database unavailable", "error": detail})
+        return {"message": "Connected to DB", "mysql_version": detail}
+
+    # Route, pool, cache and rate-limit internals: only served to a scraper holding METRICS_TOKEN
+    if Setting.METRICS_ENABLED and Setting.METRICS_TOKEN:
+        from fastapi import Request
+        from app.core.metrics import CONTENT_TYPE, metrics_exporter, scrape_authorized
+
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics(request: Request):
+            if not scrape_authorized(request.headers.get("authorization")):
+                return JSONResponse(
+                    status_code=401,
+                    content={"success": False, "message": "Invalid metrics token", "data": {}},
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            return Response(await metrics_exporter.exposition(), media_type=CONTENT_TYPE)
 
+    return app
 
-app.openapi = custom_openapi
 
-@app.get("/")
-def read_root():
-    with engine.connect() as conn:
-        version = conn.execute(text("SELECT VERSION()")).scalar_one()
-        return {"message": "Connected to DB", "mysql_version": version}
\ No newline at end of file
+def __getattr__(name):
+    # Keeps "uvicorn app.main:app" working: the app is built on first access, not on import
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
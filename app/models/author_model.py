@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
 
 class Author(Base):
     __tablename__ = "authors"
+    __table_args__ = (
+        Index("ix_authors_created_at_id", "created_at", "id"),
+        Index("ix_authors_full_name_id", "full_name", "id"),
+        Index("ix_authors_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
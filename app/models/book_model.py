@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime,Float,Boolean,ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime,Float,Boolean,ForeignKey,Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
 
 class Book(Base):
     __tablename__ = "books"
+    # One composite index per keyset sort order / filter, each ending in id
+    __table_args__ = (
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_price_id", "price", "id"),
+        Index("ix_books_title_id", "title", "id"),
+        Index("ix_books_genre_id_id", "genre_id", "id"),
+        Index("ix_books_author_id_id", "author_id", "id"),
+        Index("ix_books_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False)
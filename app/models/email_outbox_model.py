@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.db.session import Base
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+    # The sender polls for due pending rows, oldest first
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    subtype = Column(String(10), nullable=False, default="html")
+    # pending -> sent, or dead once OUTBOX_MAX_ATTEMPTS sends have failed
+    status = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # Also the claim lease: a sender pushes it forward before trying, so a crash mid-send retries later
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
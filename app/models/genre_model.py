@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.session import Base
 
 class Genre(Base):
     __tablename__ = "genres"
+    __table_args__ = (
+        Index("ix_genres_name_id", "name", "id"),
+        Index("ix_genres_updated_at_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, unique=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from app.db.session import Base
+
+class ImageBlob(Base):
+    __tablename__ = "image_blobs"
+    # Garbage collection scans unreferenced blobs by age
+    __table_args__ = (
+        Index("ix_image_blobs_ref_count_updated_at", "ref_count", "updated_at"),
+    )
+
+    # sha256 hex digest of the content; the file lives at uploads/blobs/<2>/<2>/<sha256><ext>
+    sha256 = Column(String(64), primary_key=True)
+    ext = Column(String(8), nullable=False)
+    content_type = Column(String(32), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Number of Book.image / Author.image / User.image values pointing at this blob
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
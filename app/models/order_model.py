@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, UniqueConstraint
+from datetime import datetime
+from app.db.session import Base
+
+class CartItem(Base):
+    __tablename__ = "cart_items"
+    __table_args__ = (
+        UniqueConstraint("user_id", "book_id", name="uq_cart_items_user_id_book_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    quantity = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Order(Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        # A replayed checkout finds the first order by key instead of reserving stock again
+        UniqueConstraint("user_id", "idempotency_key", name="uq_orders_user_id_idempotency_key"),
+        # The expiry sweep looks for pending orders whose reservation has run out
+        Index("ix_orders_status_reserved_until", "status", "reserved_until"),
+        Index("ix_orders_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # pending_payment -> paid -> fulfilled, or cancelled / expired (stock returned) / refunded
+    status = Column(String(20), nullable=False, default="pending_payment")
+    total_cents = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False)
+    idempotency_key = Column(String(64), nullable=True)
+    payment_intent_id = Column(String(255), nullable=True, index=True)
+    reserved_until = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    paid_at = Column(DateTime, nullable=True)
+    fulfilled_at = Column(DateTime, nullable=True)
+
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price_cents = Column(Integer, nullable=False)
@@ -5,5 +5,8 @@ from app.db.session import Base
 class BlacklistedToken(Base):
     __tablename__ = "token_blacklist"
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String(500), unique=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    # sha256 hex digest of the JWT; the raw token is never stored
+    token_hash = Column(String(64), unique=True, nullable=False)
+    # copied from the token's exp claim so expired rows can be compacted away
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 class AuthorBase(BaseModel):
     full_name: str
@@ -15,8 +15,13 @@ class AuthorUpdate(BaseModel):
     biography: Optional[str] = None
     image: Optional[str] = None
 
+class AuthorSummary(AuthorBase):
+    id: int
+    image_variants: Optional[Dict[str, str]]
+
 class AuthorResponse(AuthorBase):
     id: int
+    image_variants: Optional[Dict[str, str]]
     created_at: datetime
     updated_at: datetime
 
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 class BookCreate(BaseModel):
     title: str
@@ -26,6 +27,55 @@ class BookResponse(BaseModel):
     stock: int
     is_active: bool
     image: Optional[str]
+    image_variants: Optional[Dict[str, str]]
 
     class Config:
         orm_mode = True
+
+class BookListItem(BookResponse):
+    author: Optional[str]
+    genre: Optional[str]
+
+class BookDetail(BookListItem):
+    author_id: Optional[int]
+    genre_id: Optional[int]
+    description: str
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+class BookSearchItem(BookListItem):
+    score: float
+
+class BookWriteResponse(BookListItem):
+    description: str
+
+class BookImportRow(BaseModel):
+    title: str
+    author: str
+    genre: str
+    price: float
+    stock: int = 0
+    description: str = ""
+    is_active: bool = True
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportJobResponse(BaseModel):
+    job_id: str
+    filename: Optional[str]
+    format: str
+    dry_run: bool
+    status: str
+    processed: int
+    inserted: int
+    # Rows a dry run validated and would have inserted
+    would_insert: int = 0
+    failed: int
+    authors_created: int
+    genres_created: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+    created_at: datetime
+    finished_at: Optional[datetime]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Optional
 
 class GenreBase(BaseModel):
@@ -17,3 +18,7 @@ class GenreResponse(GenreBase):
 
     class Config:
         from_attributes = True
+
+class GenreListItem(GenreResponse):
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
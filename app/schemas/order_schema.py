@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class CartItemUpdate(BaseModel):
+    quantity: int
+
+class CartLine(BaseModel):
+    book_id: int
+    title: str
+    price: float
+    stock: int
+    quantity: int
+
+class OrderLineIn(BaseModel):
+    book_id: int
+    quantity: int = 1
+
+class CheckoutRequest(BaseModel):
+    # Omit to check out the cart
+    items: Optional[List[OrderLineIn]] = None
+
+class PaymentRequest(BaseModel):
+    payment_method: str
+
+class OrderLine(BaseModel):
+    book_id: int
+    title: str
+    quantity: int
+    unit_price: float
+
+class OrderResponse(BaseModel):
+    id: int
+    user_id: int
+    status: str
+    total: float
+    currency: str
+    items: List[OrderLine]
+    payment_intent_id: Optional[str]
+    # Only returned by checkout, for confirming the payment on the client
+    client_secret: Optional[str]
+    reserved_until: datetime
+    created_at: Optional[datetime]
+    paid_at: Optional[datetime]
+    fulfilled_at: Optional[datetime]
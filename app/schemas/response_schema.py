@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+from typing import Generic, List, Optional, TypeVar
+
+DataT = TypeVar("DataT")
+
+
+# Envelopes document the response shape in OpenAPI. Handlers render them with
+# success_response() directly, so these models never validate a payload.
+class Envelope(GenericModel, Generic[DataT]):
+    success: bool = True
+    message: str
+    data: DataT
+
+class Message(BaseModel):
+    success: bool = True
+    message: str
+    data: dict = {}
+
+class CursorMeta(BaseModel):
+    next_cursor: Optional[str]
+    limit: int
+    sort: str
+
+class CursorPage(GenericModel, Generic[DataT]):
+    success: bool = True
+    message: str
+    data: List[DataT]
+    meta: CursorMeta
+
+class OffsetMeta(BaseModel):
+    limit: int
+    offset: int
+    next_offset: Optional[int]
+
+class OffsetPage(GenericModel, Generic[DataT]):
+    success: bool = True
+    message: str
+    data: List[DataT]
+    meta: OffsetMeta
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
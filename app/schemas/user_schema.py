@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Dict, Optional
 
 class UserBase(BaseModel):
     full_name: Optional[str]
@@ -24,4 +24,15 @@ class UserResponse(UserBase):
     id: Optional[int]
     is_verified: Optional[bool]
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class UserProfile(UserBase):
+    id: int
+    image_variants: Optional[Dict[str, str]]
+    email: str
+    is_verified: Optional[bool]
+
+class UserProfileUpdate(UserBase):
+    id: int
+    image_variants: Optional[Dict[str, str]]
+    email: str
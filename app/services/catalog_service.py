@@ -0,0 +1,45 @@
+from sqlalchemy import func, select
+from app.models.author_model import Author
+from app.models.book_model import Book
+from app.models.genre_model import Genre
+
+# Listing skips the description TEXT column; detail adds it back with the FK ids and timestamps
+LIST_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.price,
+    Book.stock,
+    Book.is_active,
+    Book.image,
+    Author.full_name.label("author"),
+    Genre.name.label("genre"),
+)
+DETAIL_COLUMNS = LIST_COLUMNS + (
+    Book.author_id,
+    Book.genre_id,
+    Book.description,
+    Book.created_at,
+    Book.updated_at,
+)
+
+
+def catalog_query(*columns):
+    """Books joined to their author and genre names in a single round trip."""
+    return (
+        select(*columns)
+        .outerjoin(Author, Book.author_id == Author.id)
+        .outerjoin(Genre, Book.genre_id == Genre.id)
+    )
+
+# A book's representation embeds its author and genre names, so its version is all three timestamps
+VERSION_COLUMNS = (Book.updated_at, Author.updated_at.label("author_updated_at"), Genre.updated_at.label("genre_updated_at"))
+
+
+def catalog_versions(*filters):
+    """Row count and newest timestamps of the books matching ``filters``, for list validators."""
+    return catalog_query(
+        func.count(Book.id),
+        func.max(Book.updated_at),
+        func.max(Author.updated_at),
+        func.max(Genre.updated_at),
+    ).where(*filters)
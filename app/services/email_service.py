@@ -1,36 +1,22 @@
-from fastapi_mail import FastMail,MessageSchema,ConnectionConfig
 from app.core.config import Setting
+from app.models.email_outbox_model import OutboxEmail
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=Setting.MAIL_USERNAME,
-    MAIL_PASSWORD=Setting.MAIL_PASSWORD,
-    MAIL_FROM=Setting.MAIL_FROM,
-    MAIL_PORT=Setting.MAIL_PORT,
-    MAIL_SERVER=Setting.MAIL_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
 
-async def send_verification_email(email:str,token:str):
+def queue_email(db, recipient: str, subject: str, body: str, subtype: str = "html"):
+    """Add a message to the outbox in ``db``'s transaction.
+
+    Nothing is sent until the caller commits, and a rollback drops the
+    message together with the rows it was about. The outbox sender delivers
+    it in the background.
+    """
+    db.add(OutboxEmail(recipient=recipient, subject=subject, body=body, subtype=subtype))
+
+
+def queue_verification_email(db, email: str, token: str):
     verification_url = f"{Setting.APP_URL}/api/v1/auth/verify?token={token}"
-    message = MessageSchema(
-        subject="Verify your Account",
-        recipients=[email],
-        body=f"Click the link to verify: {verification_url}",
-        subtype="html"
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    queue_email(db, email, "Verify your Account", f"Click the link to verify: {verification_url}")
+
 
-async def send_reset_email(email:str,token:str):
+def queue_reset_email(db, email: str, token: str):
     verification_url = f"{Setting.APP_URL}/api/v1/auth/reset?token={token}"
-    message = MessageSchema(
-        subject="Reset your Password",
-        recipients=[email],
-        body=f"Click the link to reset: {verification_url}",
-        subtype="html"
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
\ No newline at end of file
+    queue_email(db, email, "Reset your Password", f"Click the link to reset: {verification_url}")
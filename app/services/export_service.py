@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.config import Setting
+from app.db.session import ThreadedSession
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def iter_partitions(db, stmt, size: int):
+    """Yield lists of row mappings from a server-side cursor.
+
+    Only ``size`` rows are held in memory at a time, whichever session type
+    the request got.
+    """
+    stmt = stmt.execution_options(yield_per=size)
+    if isinstance(db, ThreadedSession):
+        result = await run_in_threadpool(db.sync_session.execute, stmt)
+        mappings = result.mappings()
+        try:
+            while True:
+                rows = await run_in_threadpool(mappings.fetchmany, size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await run_in_threadpool(result.close)
+    else:
+        result = await db.stream(stmt)
+        try:
+            async for rows in result.mappings().partitions(size):
+                yield rows
+        finally:
+            await result.close()
+
+
+def _encode_ndjson(rows, fields, first):
+    return "".join(json.dumps({f: row[f] for f in fields}, default=_json_default) + "\n" for row in rows)
+
+
+def _encode_csv(rows, fields, first):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if first:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow([row[f].isoformat() if isinstance(row[f], (datetime, date)) else row[f] for f in fields])
+    return buffer.getvalue()
+
+
+async def _export_body(db, stmt, fields, fmt, compress):
+    encode = _encode_ndjson if fmt == "ndjson" else _encode_csv
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    first = True
+    async for rows in iter_partitions(db, stmt, Setting.EXPORT_CHUNK_SIZE):
+        chunk = encode(rows, fields, first).encode()
+        first = False
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if first and fmt == "csv":
+        chunk = encode([], fields, True).encode()
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def export_response(db, stmt, fields, fmt: str, compress: bool, filename: str):
+    """Stream ``stmt`` as NDJSON or CSV, optionally gzip-encoded, in constant memory."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail={"success": False, "message": f"Unsupported format '{fmt}'. Use ndjson or csv", "data": {}}
+        )
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _export_body(db, stmt, fields, fmt, compress),
+        media_type=EXPORT_FORMATS[fmt],
+        headers=headers,
+    )
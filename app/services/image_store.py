@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+from starlette.concurrency import run_in_threadpool
+from app.core.config import Setting
+from app.db.session import SessionLocal, engine
+from app.models.author_model import Author
+from app.models.book_model import Book
+from app.models.image_blob_model import ImageBlob
+from app.models.user_model import User
+from app.services.image_variants import VARIANT_WIDTHS, missing_variants, render_all, variant_executor, variant_path
+from app.services.upload_service import UPLOAD_TEMP_DIR, PendingUpload, receive_upload, sniff_image
+
+BLOB_ROOT = "uploads/blobs"
+# Every column that may hold a blob URL; each non-null value is one reference
+IMAGE_COLUMNS = (Book.image, Author.image, User.image)
+BLOB_URL_PREFIX = f"/{BLOB_ROOT}/"
+GC_BATCH_SIZE = 500
+
+
+def blob_path(sha256: str, ext: str) -> str:
+    """Two levels of hash-prefix sharding keep every directory small."""
+    return f"{BLOB_ROOT}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def blob_key(url: str):
+    """sha256 of a blob URL, or ``None`` for empty and legacy (pre content-addressed) paths."""
+    if not url or not url.startswith(BLOB_URL_PREFIX):
+        return None
+    return os.path.splitext(os.path.basename(url))[0]
+
+
+def image_variants(url: str):
+    """URLs of the WebP derivatives of a stored image, by variant name; ``None`` for legacy paths.
+
+    Derivatives are rendered in the background right after upload, so a
+    client should fall back to ``image`` for the moment one takes to appear.
+    """
+    if blob_key(url) is None:
+        return None
+    return {name: variant_path(url, name) for name in VARIANT_WIDTHS}
+
+
+def add_image_variants(items):
+    """Set ``image_variants`` on each dict in ``items`` from its ``image``; returns ``items``."""
+    for item in items:
+        item["image_variants"] = image_variants(item["image"])
+    return items
+
+
+def _retain_statement(pending, now, count: int = 1):
+    values = dict(
+        sha256=pending.sha256,
+        ext=pending.ext,
+        content_type=pending.content_type,
+        size=pending.size,
+        ref_count=count,
+        created_at=now,
+        updated_at=now,
+    )
+    if engine.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        return insert(ImageBlob).values(**values).on_duplicate_key_update(
+            ref_count=ImageBlob.ref_count + count, updated_at=now
+        )
+    from sqlalchemy.dialects.sqlite import insert
+    return insert(ImageBlob).values(**values).on_conflict_do_update(
+        index_elements=[ImageBlob.sha256], set_={"ref_count": ImageBlob.ref_count + count, "updated_at": now}
+    )
+
+
+def _place(temp_path: str, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Identical content may already be there; replacing it is an atomic no-op for readers
+    os.replace(temp_path, path)
+
+
+async def store_image(db, upload, kind: str) -> str:
+    """Store an uploaded image by content hash and take a reference to it in ``db``'s transaction.
+
+    Returns the public URL to save in the owning row. The reference is
+    counted before the file is moved into place, so a concurrent garbage
+    collection either finishes first or sees the new reference.
+    """
+    pending = await receive_upload(upload, kind)
+    path = blob_path(pending.sha256, pending.ext)
+    try:
+        await db.execute(_retain_statement(pending, datetime.utcnow()))
+        await run_in_threadpool(_place, pending.temp_path, path)
+    except BaseException:
+        if await run_in_threadpool(os.path.exists, pending.temp_path):
+            await run_in_threadpool(os.remove, pending.temp_path)
+        raise
+    variant_executor.submit(path)
+    return f"/{path}"
+
+
+async def release_image(db, url: str):
+    """Drop one reference to the blob behind ``url``; the garbage collector removes it at zero."""
+    sha256 = blob_key(url)
+    if sha256 is None:
+        return
+    await db.execute(
+        update(ImageBlob)
+        .where(ImageBlob.sha256 == sha256)
+        .values(ref_count=ImageBlob.ref_count - 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _collect_unreferenced(session, cutoff) -> int:
+    removed = 0
+    while True:
+        candidates = session.execute(
+            select(ImageBlob.sha256, ImageBlob.ext)
+            .where(ImageBlob.ref_count <= 0, ImageBlob.updated_at < cutoff)
+            .limit(GC_BATCH_SIZE)
+        ).all()
+        for sha256, ext in candidates:
+            # Re-checked under the row lock: a blob re-uploaded meanwhile has a reference again
+            result = session.execute(
+                delete(ImageBlob).where(
+                    ImageBlob.sha256 == sha256, ImageBlob.ref_count <= 0, ImageBlob.updated_at < cutoff
+                )
+            )
+            if result.rowcount:
+                path = blob_path(sha256, ext)
+                _remove(path)
+                for name in VARIANT_WIDTHS:
+                    _remove(variant_path(path, name))
+                removed += 1
+            session.commit()
+        if len(candidates) < GC_BATCH_SIZE:
+            return removed
+
+
+def _sweep_untracked(session, cutoff_ts: float) -> int:
+    """Remove old files with no blob row, left behind by transactions that rolled back.
+
+    Originals and their derivatives all start with the 64-character sha256.
+    """
+    removed = 0
+    for directory, _, files in os.walk(BLOB_ROOT):
+        if not files:
+            continue
+        if os.path.normpath(directory) == os.path.normpath(UPLOAD_TEMP_DIR):
+            for name in files:
+                path = os.path.join(directory, name)
+                if os.path.getmtime(path) < cutoff_ts:
+                    _remove(path)
+                    removed += 1
+            continue
+        by_hash = {}
+        for name in files:
+            by_hash.setdefault(name[:64], []).append(name)
+        known = set(session.scalars(select(ImageBlob.sha256).where(ImageBlob.sha256.in_(by_hash))))
+        for sha256, names in by_hash.items():
+            if sha256 in known:
+                continue
+            for name in names:
+                path = os.path.join(directory, name)
+                if os.path.getmtime(path) < cutoff_ts:
+                    _remove(path)
+                    removed += 1
+    return removed
+
+
+def collect_garbage(grace_seconds: int = None) -> dict:
+    """Delete blobs nobody references any more, and stray files the store does not track.
+
+    Only blobs unreferenced for longer than the grace period are touched, so
+    an upload whose transaction is still open is never collected under it.
+    """
+    grace = Setting.IMAGE_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    with SessionLocal() as session:
+        blobs = _collect_unreferenced(session, datetime.utcnow() - timedelta(seconds=grace))
+        files = _sweep_untracked(session, time.time() - grace)
+    return {"blobs_removed": blobs, "untracked_files_removed": files}
+
+
+def _read_legacy(path: str):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        detected = sniff_image(handle.read(16))
+        handle.seek(0)
+        for chunk in iter(lambda: handle.read(Setting.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    if detected is None:
+        return None
+    return PendingUpload(path, size, digest.hexdigest(), *detected)
+
+
+def migrate_legacy_images() -> dict:
+    """Move images stored under random names into the blob store and repoint their rows.
+
+    Files that are missing or not recognisable images are left alone and reported.
+    """
+    moved, skipped = 0, []
+    with SessionLocal() as session:
+        for column in IMAGE_COLUMNS:
+            urls = session.scalars(
+                select(column).where(column.isnot(None), ~column.startswith(BLOB_URL_PREFIX)).distinct()
+            ).all()
+            for url in urls:
+                source = url.lstrip("/")
+                pending = _read_legacy(source) if os.path.isfile(source) else None
+                if pending is None:
+                    skipped.append(url)
+                    continue
+                path = blob_path(pending.sha256, pending.ext)
+                count = session.execute(
+                    update(column.class_).where(column == url).values({column.key: f"/{path}"})
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                session.execute(_retain_statement(pending, datetime.utcnow(), count))
+                _place(source, path)
+                session.commit()
+                moved += 1
+    return {"moved": moved, "skipped": skipped}
+
+
+def backfill_variants(workers: int = None) -> dict:
+    """Render any missing derivatives of every referenced image, e.g. after ``migrate``."""
+    with SessionLocal() as session:
+        rows = session.execute(select(ImageBlob.sha256, ImageBlob.ext).where(ImageBlob.ref_count > 0)).all()
+    paths = [path for path in (blob_path(sha256, ext) for sha256, ext in rows)
+             if os.path.exists(path) and missing_variants(path)]
+    return render_all(paths, Setting.IMAGE_WORKERS if workers is None else workers)
+
+
+def reconcile_ref_counts() -> int:
+    """Recount references from the image columns, repairing any drift. Returns rows changed."""
+    with SessionLocal() as session:
+        counts = {}
+        for column in IMAGE_COLUMNS:
+            rows = session.execute(
+                select(column, func.count()).where(column.startswith(BLOB_URL_PREFIX)).group_by(column)
+            )
+            for url, count in rows:
+                key = blob_key(url)
+                counts[key] = counts.get(key, 0) + count
+        changed = 0
+        for sha256, ref_count in session.execute(select(ImageBlob.sha256, ImageBlob.ref_count)).all():
+            actual = counts.get(sha256, 0)
+            if actual != ref_count:
+                session.execute(
+                    update(ImageBlob).where(ImageBlob.sha256 == sha256)
+                    .values(ref_count=actual, updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                changed += 1
+        session.commit()
+    return changed
+
+
+async def run_image_gc():
+    while True:
+        await asyncio.sleep(Setting.IMAGE_GC_INTERVAL_SECONDS)
+        try:
+            result = await run_in_threadpool(collect_garbage)
+            if any(result.values()):
+                print("Image GC:", result)
+        except Exception as e:
+            print("Image GC failed:", str(e))
+
+
+def start_image_gc():
+    return asyncio.create_task(run_image_gc())
+
+
+if __name__ == "__main__":
+    # python -m app.services.image_store [migrate|variants|reconcile|gc]
+    command = sys.argv[1] if len(sys.argv) > 1 else "gc"
+    if command == "migrate":
+        print(migrate_legacy_images())
+    elif command == "variants":
+        print(backfill_variants())
+    elif command == "reconcile":
+        print("Blobs recounted:", reconcile_ref_counts())
+    else:
+        print(collect_garbage())
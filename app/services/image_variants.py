@@ -0,0 +1,162 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import Setting
+
+# Bounding-box width of each derivative; None keeps the original size. All are WebP.
+VARIANT_WIDTHS = {"thumb": 160, "small": 320, "medium": 640, "full": None}
+WEBP_QUALITY = 80
+
+
+def variant_path(path: str, name: str) -> str:
+    """``uploads/blobs/aa/bb/<sha256>_<name>.webp`` next to the original at ``path``."""
+    return f"{os.path.splitext(path)[0]}_{name}.webp"
+
+
+def missing_variants(path: str):
+    return [name for name in VARIANT_WIDTHS if not os.path.exists(variant_path(path, name))]
+
+
+def _save(image, target: str):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".variant-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            image.save(handle, "WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(temp_path, target)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def render_variants(path: str) -> int:
+    """Write the missing derivatives of the image at ``path``. Returns how many were written.
+
+    Runs in a worker process. Derivatives are written to temp files and
+    renamed into place, so readers never see a partial image.
+    """
+    # Imported here so only the worker processes pay for loading Pillow
+    from PIL import Image, ImageOps
+
+    names = missing_variants(path)
+    if not names:
+        return 0
+    with Image.open(path) as source:
+        widest = max((VARIANT_WIDTHS[name] or source.width) for name in names)
+        # Lets the JPEG decoder scale down by up to 8x while decoding
+        source.draft("RGB", (widest, source.height * widest // max(source.width, 1)))
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P", "PA") else "RGB")
+    for name in names:
+        width = VARIANT_WIDTHS[name]
+        resized = image
+        if width is not None and image.width > width:
+            resized = image.copy()
+            resized.thumbnail((width, image.height), Image.LANCZOS)
+        _save(resized, variant_path(path, name))
+    return len(names)
+
+
+def render_all(paths, workers: int) -> dict:
+    """Render derivatives for ``paths`` in a process pool, blocking until done."""
+    if workers <= 0:
+        return _tally(map(_render_safely, paths))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return _tally(pool.map(_render_safely, paths, chunksize=16))
+
+
+def _render_safely(path: str):
+    try:
+        return render_variants(path)
+    except Exception as e:
+        print("Image variants failed for", path, str(e))
+        return None
+
+
+def _tally(results) -> dict:
+    totals = {"images": 0, "variants_written": 0, "failed": 0}
+    for result in results:
+        totals["images"] += 1
+        if result is None:
+            totals["failed"] += 1
+        else:
+            totals["variants_written"] += result
+    return totals
+
+
+class VariantExecutor:
+    """Renders image derivatives in a dedicated process pool, off the request path.
+
+    Decoding and resizing are CPU bound, so uploads only enqueue the work and
+    return. The backlog is bounded: past ``max_pending`` an image is skipped
+    and left to the backfill command.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._lock = threading.Lock()
+        self._tasks = set()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    async def _run(self, path: str):
+        try:
+            if self.workers <= 0:
+                await run_in_threadpool(render_variants, path)
+            else:
+                await asyncio.get_running_loop().run_in_executor(self._get_pool(), render_variants, path)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print("Image variants failed for", path, str(e))
+        finally:
+            self.pending -= 1
+
+    def submit(self, path: str):
+        """Queue derivatives for the image at ``path`` without waiting for them."""
+        if self.pending >= self.max_pending:
+            self.skipped += 1
+            return
+        self.pending += 1
+        task = asyncio.create_task(self._run(path))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+variant_executor = VariantExecutor(Setting.IMAGE_WORKERS, Setting.IMAGE_MAX_PENDING)
@@ -0,0 +1,250 @@
+import asyncio
+import csv
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from starlette.concurrency import run_in_threadpool
+from app.core.catalog_cache import catalog_cache
+from app.core.config import Setting
+from app.db.session import open_session
+from app.models.author_model import Author
+from app.models.book_model import Book
+from app.models.genre_model import Genre
+from app.schemas.book_schema import BookImportRow
+from app.services.search_service import index_books
+from app.utils.response import error_message
+
+IMPORT_FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 1000
+MAX_TRACKED_JOBS = 100
+FINISHED = ("completed", "failed")
+
+
+class ImportJob:
+    """Progress and per-row error report of one bulk import.
+
+    Jobs live in this worker's memory only; poll the status resource on the
+    same instance that accepted the upload. A dry run counts the rows it
+    would have inserted in ``would_insert`` and leaves ``inserted`` at 0.
+    """
+
+    def __init__(self, filename: str, fmt: str, dry_run: bool):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.format = fmt
+        self.dry_run = dry_run
+        self.status = "queued"
+        self.processed = 0
+        self.inserted = 0
+        self.would_insert = 0
+        self.failed = 0
+        self.authors_created = 0
+        self.genres_created = 0
+        self.errors = []
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    def add_error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "format": self.format,
+            "dry_run": self.dry_run,
+            "status": self.status,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "would_insert": self.would_insert,
+            "failed": self.failed,
+            "authors_created": self.authors_created,
+            "genres_created": self.genres_created,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+import_jobs = OrderedDict()
+_running = set()
+_slots = asyncio.Semaphore(max(Setting.IMPORT_MAX_CONCURRENT, 1))
+
+
+def import_format(filename: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    ext = os.path.splitext(filename or "")[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def _read_rows(path: str, fmt: str):
+    """Yield ``(row_number, dict_or_error)`` from a CSV or JSONL file without loading it whole."""
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        if fmt == "csv":
+            for number, record in enumerate(csv.DictReader(handle), start=1):
+                yield number, {k.strip(): v for k, v in record.items() if k and v not in (None, "")}
+            return
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+
+
+class _NameResolver:
+    """name -> id map for authors or genres, filled one chunk at a time."""
+
+    def __init__(self, model, name_column):
+        self.model = model
+        self.name_column = name_column
+        self.ids = {}
+        self._placeholder = 0
+
+    async def resolve(self, db, names, create: bool) -> int:
+        missing = {name for name in names if name not in self.ids}
+        if not missing:
+            return 0
+        rows = await db.execute(select(self.model.id, self.name_column).where(self.name_column.in_(missing)))
+        for row_id, name in rows:
+            self.ids.setdefault(name, row_id)
+        missing -= self.ids.keys()
+        if not missing:
+            return 0
+        if create:
+            instances = [self.model(**{self.name_column.key: name}) for name in missing]
+            db.add_all(instances)
+            await db.flush()
+            for instance in instances:
+                self.ids[getattr(instance, self.name_column.key)] = instance.id
+        else:
+            # Dry run: pretend they exist so the rest of the row is still validated
+            for name in missing:
+                self._placeholder -= 1
+                self.ids[name] = self._placeholder
+        return len(missing)
+
+
+async def _import_chunk(db, job, chunk, authors, genres):
+    valid = []
+    for number, record in chunk:
+        job.processed += 1
+        if isinstance(record, Exception):
+            job.add_error(number, f"Invalid JSON: {record}")
+            continue
+        try:
+            valid.append((number, BookImportRow(**record)))
+        except (TypeError, ValidationError) as e:
+            job.add_error(number, str(e))
+    if not valid:
+        return
+
+    try:
+        new_authors = await authors.resolve(db, {row.author for _, row in valid}, not job.dry_run)
+        new_genres = await genres.resolve(db, {row.genre for _, row in valid}, not job.dry_run)
+        values = [
+            {
+                "title": row.title,
+                "author_id": authors.ids[row.author],
+                "genre_id": genres.ids[row.genre],
+                "price": row.price,
+                "stock": row.stock,
+                "description": row.description,
+                "is_active": row.is_active,
+            }
+            for _, row in valid
+        ]
+        if not job.dry_run:
+            # One executemany per chunk, committed as its own transaction
+            last_id = await db.scalar(select(func.max(Book.id)))
+            await db.execute(insert(Book), values)
+            await index_books(db, Book.id > (last_id or 0))
+            await db.commit()
+            await catalog_cache.invalidate("books", *(("authors",) if new_authors else ()), *(("genres",) if new_genres else ()))
+            job.inserted += len(values)
+        else:
+            job.would_insert += len(values)
+        job.authors_created += new_authors
+        job.genres_created += new_genres
+    except Exception as e:
+        await db.rollback()
+        # Authors/genres flushed in this chunk were rolled back with it
+        authors.ids.clear()
+        genres.ids.clear()
+        for number, _ in valid:
+            job.add_error(number, f"Batch failed: {str(e) or type(e).__name__}")
+
+
+async def run_import(job: ImportJob, path: str):
+    """Process the spooled file once one of the ``IMPORT_MAX_CONCURRENT`` slots is free."""
+    try:
+        async with _slots:
+            job.status = "running"
+            await _run_import(job, path)
+    finally:
+        await run_in_threadpool(os.remove, path)
+
+
+async def _run_import(job: ImportJob, path: str):
+    authors = _NameResolver(Author, Author.full_name)
+    genres = _NameResolver(Genre, Genre.name)
+    rows = _read_rows(path, job.format)
+    db = open_session()
+    try:
+        while True:
+            chunk = await run_in_threadpool(lambda: list(islice(rows, Setting.IMPORT_CHUNK_SIZE)))
+            if not chunk:
+                break
+            await _import_chunk(db, job, chunk, authors, genres)
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.add_error(0, str(e))
+    finally:
+        job.finished_at = datetime.utcnow()
+        rows.close()
+        await db.close()
+
+
+def _spool(source, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+        return target.name
+
+
+def _evict_finished():
+    """Forget the oldest finished jobs beyond ``MAX_TRACKED_JOBS - 1``; queued and running ones are kept."""
+    finished = [job_id for job_id, job in import_jobs.items() if job.status in FINISHED]
+    for job_id in finished[:max(len(import_jobs) - MAX_TRACKED_JOBS + 1, 0)]:
+        del import_jobs[job_id]
+
+
+async def start_import(upload, fmt: str, dry_run: bool) -> ImportJob:
+    """Copy the upload aside and process it in the background.
+
+    Refused with 429 when ``MAX_TRACKED_JOBS`` imports are still unfinished,
+    since none of them can be forgotten while it may still be polled.
+    """
+    _evict_finished()
+    if len(import_jobs) >= MAX_TRACKED_JOBS:
+        error_message(429, "Too many imports in progress, retry later")
+    job = ImportJob(upload.filename, fmt, dry_run)
+    path = await run_in_threadpool(_spool, upload.file, f".{fmt}")
+    import_jobs[job.id] = job
+    task = asyncio.create_task(run_import(job, path))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return job
@@ -0,0 +1,295 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from app.core.config import Setting
+from app.db.session import SessionLocal
+from app.models.email_outbox_model import OutboxEmail
+
+PENDING = "pending"
+SENT = "sent"
+DEAD = "dead"
+
+
+class PermanentMailError(Exception):
+    """The server rejected the message outright (5xx); retrying cannot help."""
+
+
+class MailBackend:
+    """Delivers composed messages. ``send`` raises on failure and the outbox retries."""
+
+    async def send(self, message: EmailMessage):
+        raise NotImplementedError
+
+    async def close_idle(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class SMTPMailBackend(MailBackend):
+    """One SMTP session reused for every message, across batches.
+
+    The TLS handshake and login are paid once per connection rather than
+    once per email. A dropped connection is reopened and the message retried
+    once; a connection idle for ``idle_seconds`` is closed by the sender.
+    """
+
+    def __init__(self, hostname, port, username=None, password=None, use_tls=False, start_tls=True,
+                 validate_certs=True, timeout=30, idle_seconds=60):
+        self.options = dict(
+            hostname=hostname,
+            port=int(port) if port else None,
+            username=username,
+            password=password,
+            use_tls=use_tls,
+            start_tls=start_tls,
+            validate_certs=validate_certs,
+            timeout=timeout,
+        )
+        self.idle_seconds = idle_seconds
+        self._client = None
+        self._last_used = 0.0
+
+    async def _connected(self):
+        import aiosmtplib
+        if self._client is not None and not self._client.is_connected:
+            self._client = None
+        if self._client is None:
+            client = aiosmtplib.SMTP(**self.options)
+            await client.connect()
+            self._client = client
+        return self._client
+
+    async def send(self, message):
+        import aiosmtplib
+        try:
+            try:
+                await (await self._connected()).send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # The server may have dropped the session since the last batch
+                await self.close()
+                await (await self._connected()).send_message(message)
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            # The session is still usable after a rejected message; reset it for the next one
+            await self._reset()
+            if all(refused.code >= 500 for refused in e.recipients):
+                raise PermanentMailError(str(e)) from e
+            raise
+        except (aiosmtplib.SMTPRecipientRefused, aiosmtplib.SMTPDataError) as e:
+            await self._reset()
+            if e.code >= 500:
+                raise PermanentMailError(str(e)) from e
+            raise
+        except Exception:
+            await self.close()
+            raise
+        finally:
+            self._last_used = time.monotonic()
+
+    async def _reset(self):
+        try:
+            await self._client.rset()
+        except Exception:
+            await self.close()
+
+    async def close_idle(self):
+        if self._client is not None and time.monotonic() - self._last_used >= self.idle_seconds:
+            await self.close()
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is not None and client.is_connected:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class ConsoleMailBackend(MailBackend):
+    """Prints messages instead of sending them, for development and load tests."""
+
+    async def send(self, message):
+        print("Mail to", message["To"], "-", message["Subject"])
+
+
+def _backend() -> MailBackend:
+    if Setting.MAIL_BACKEND == "console":
+        return ConsoleMailBackend()
+    return SMTPMailBackend(
+        Setting.MAIL_SERVER,
+        Setting.MAIL_PORT,
+        username=Setting.MAIL_USERNAME if Setting.MAIL_USE_CREDENTIALS else None,
+        password=Setting.MAIL_PASSWORD if Setting.MAIL_USE_CREDENTIALS else None,
+        use_tls=Setting.MAIL_SSL_TLS,
+        start_tls=Setting.MAIL_STARTTLS and not Setting.MAIL_SSL_TLS,
+        validate_certs=Setting.MAIL_VALIDATE_CERTS,
+        timeout=Setting.MAIL_TIMEOUT_SECONDS,
+        idle_seconds=Setting.MAIL_IDLE_SECONDS,
+    )
+
+
+def compose(row) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = Setting.MAIL_FROM
+    message["To"] = row.recipient
+    message["Subject"] = row.subject
+    message.set_content(row.body, subtype=row.subtype)
+    return message
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter, so a recovering server is not hit in lockstep."""
+    delay = min(Setting.OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), Setting.OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(limit: int):
+    """Lease up to ``limit`` due messages to this sender and count the attempt.
+
+    Each row is claimed with a conditional UPDATE on the ``next_attempt_at``
+    it was read with, so concurrent senders in other workers never take the
+    same row. A sender that dies mid-batch leaves rows that become due again
+    when the lease runs out, so delivery is at least once.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=Setting.OUTBOX_LEASE_SECONDS)
+    with SessionLocal() as session:
+        candidates = session.execute(
+            select(OutboxEmail.id, OutboxEmail.next_attempt_at)
+            .where(OutboxEmail.status == PENDING, OutboxEmail.next_attempt_at <= now)
+            .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+            .limit(limit)
+        ).all()
+        claimed = []
+        for row_id, seen in candidates:
+            result = session.execute(
+                update(OutboxEmail)
+                .where(OutboxEmail.id == row_id, OutboxEmail.status == PENDING, OutboxEmail.next_attempt_at == seen)
+                .values(next_attempt_at=lease_until, attempts=OutboxEmail.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(row_id)
+        session.commit()
+        if not claimed:
+            return []
+        return session.execute(
+            select(OutboxEmail.id, OutboxEmail.recipient, OutboxEmail.subject, OutboxEmail.body,
+                   OutboxEmail.subtype, OutboxEmail.attempts)
+            .where(OutboxEmail.id.in_(claimed))
+            .order_by(OutboxEmail.id)
+        ).all()
+
+
+def record_results(results):
+    """Apply ``(row, error, permanent)`` outcomes: sent, retry later, or dead-letter."""
+    now = datetime.utcnow()
+    counts = {SENT: 0, PENDING: 0, DEAD: 0}
+    with SessionLocal() as session:
+        for row, error, permanent in results:
+            if error is None:
+                values = dict(status=SENT, sent_at=now, last_error=None)
+            elif permanent or row.attempts >= Setting.OUTBOX_MAX_ATTEMPTS:
+                values = dict(status=DEAD, last_error=error[:2000])
+            else:
+                values = dict(next_attempt_at=now + timedelta(seconds=retry_delay(row.attempts)), last_error=error[:2000])
+            counts[values.get("status", PENDING)] += 1
+            session.execute(
+                update(OutboxEmail).where(OutboxEmail.id == row.id).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        session.commit()
+    return counts
+
+
+def purge_sent() -> int:
+    cutoff = datetime.utcnow() - timedelta(days=Setting.OUTBOX_RETENTION_DAYS)
+    with SessionLocal() as session:
+        deleted = session.execute(
+            delete(OutboxEmail).where(OutboxEmail.status == SENT, OutboxEmail.sent_at < cutoff)
+        ).rowcount
+        session.commit()
+    return deleted
+
+
+class OutboxSender:
+    """Background loop draining ``email_outbox`` through one ``MailBackend``.
+
+    Wakes every ``OUTBOX_POLL_SECONDS``, or at once when a request in this
+    worker queues mail, and keeps going while batches come back full.
+    """
+
+    def __init__(self, backend: MailBackend = None, batch_size: int = 50, poll_seconds: float = 5):
+        self._backend = backend
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wake = asyncio.Event()
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+
+    @property
+    def backend(self) -> MailBackend:
+        if self._backend is None:
+            self._backend = _backend()
+        return self._backend
+
+    def wake(self):
+        self._wake.set()
+
+    async def drain_once(self) -> int:
+        """Send one batch; returns how many messages were attempted."""
+        rows = await run_in_threadpool(claim_batch, self.batch_size)
+        results = []
+        for row in rows:
+            try:
+                await self.backend.send(compose(row))
+                results.append((row, None, False))
+            except PermanentMailError as e:
+                results.append((row, str(e), True))
+            except Exception as e:
+                results.append((row, f"{type(e).__name__}: {e}", False))
+        if results:
+            counts = await run_in_threadpool(record_results, results)
+            self.sent += counts[SENT]
+            self.retried += counts[PENDING]
+            self.dead += counts[DEAD]
+        return len(rows)
+
+    async def run(self):
+        last_purge = time.monotonic()
+        while True:
+            self._wake.clear()
+            try:
+                while await self.drain_once() >= self.batch_size:
+                    pass
+                await self.backend.close_idle()
+                if time.monotonic() - last_purge >= 3600:
+                    await run_in_threadpool(purge_sent)
+                    last_purge = time.monotonic()
+            except Exception as e:
+                print("Outbox sender failed:", str(e))
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        return asyncio.create_task(self.run())
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+
+outbox_sender = OutboxSender(batch_size=Setting.OUTBOX_BATCH_SIZE, poll_seconds=Setting.OUTBOX_POLL_SECONDS)
@@ -0,0 +1,359 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from app.core.catalog_cache import catalog_cache
+from app.core.config import Setting
+from app.db.session import SessionLocal
+from app.models.book_model import Book
+from app.models.order_model import CartItem, Order, OrderItem
+from app.services.payments import PaymentError, payment_gateway
+from app.utils.pagination import Keyset
+
+PENDING_PAYMENT = "pending_payment"
+PAID = "paid"
+FULFILLED = "fulfilled"
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+REFUNDED = "refunded"
+
+ORDER_COLUMNS = (
+    Order.id,
+    Order.user_id,
+    Order.status,
+    Order.total_cents,
+    Order.currency,
+    Order.payment_intent_id,
+    Order.reserved_until,
+    Order.created_at,
+    Order.paid_at,
+    Order.fulfilled_at,
+)
+ORDER_KEYSET = Keyset(Order.id, {"id": Order.id}, default="-id")
+
+# The functions taking a sync ``session`` hold the transactional logic. Handlers run
+# them with ``await db.run_sync(...)`` and the expiry sweep with a SessionLocal, so
+# there is one implementation for both session modes.
+
+
+class OrderError(Exception):
+    """The order cannot be placed or changed as asked; ``str(e)`` is the client message."""
+
+    status_code = 400
+
+
+class OutOfStock(OrderError):
+    status_code = 409
+
+    def __init__(self, book_ids):
+        super().__init__(f"Not enough stock for book(s): {', '.join(str(book_id) for book_id in book_ids)}")
+        self.book_ids = book_ids
+
+
+def check_quantity(quantity: int):
+    if not 1 <= quantity <= Setting.ORDER_MAX_QUANTITY:
+        raise OrderError(f"Quantity must be between 1 and {Setting.ORDER_MAX_QUANTITY}")
+
+
+def order_quantities(lines) -> dict:
+    """``{book_id: quantity}`` from request lines, merging repeated books."""
+    quantities = {}
+    for line in lines:
+        quantities[line.book_id] = quantities.get(line.book_id, 0) + line.quantity
+    if not quantities:
+        raise OrderError("An order needs at least one item")
+    if len(quantities) > Setting.ORDER_MAX_LINES:
+        raise OrderError(f"An order can hold at most {Setting.ORDER_MAX_LINES} different books")
+    for quantity in quantities.values():
+        check_quantity(quantity)
+    return quantities
+
+
+def _per_book(quantities: dict):
+    return case(quantities, value=Book.id)
+
+
+def reserve_stock(session, quantities: dict) -> bool:
+    """Take ``{book_id: quantity}`` out of stock with one conditional UPDATE.
+
+    ``stock = stock - n WHERE stock >= n`` is checked and applied by the
+    database under the row lock, so concurrent buyers of a hot title queue on
+    the lock instead of overselling it, and a multi-item cart costs a single
+    round trip. Fewer matched rows than books means some title ran short (or
+    is inactive); the caller rolls back, which restores the rows that matched.
+    """
+    needed = _per_book(quantities)
+    result = session.execute(
+        update(Book)
+        .where(Book.id.in_(quantities), Book.is_active.is_(True), Book.stock >= needed)
+        .values(stock=Book.stock - needed)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(quantities)
+
+
+def restock(session, order_id: int):
+    quantities = {}
+    for book_id, quantity in session.execute(
+        select(OrderItem.book_id, OrderItem.quantity).where(OrderItem.order_id == order_id)
+    ).all():
+        quantities[book_id] = quantities.get(book_id, 0) + quantity
+    if quantities:
+        session.execute(
+            update(Book)
+            .where(Book.id.in_(quantities))
+            .values(stock=Book.stock + _per_book(quantities))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def order_book_ids(session, order_id: int):
+    return session.scalars(select(OrderItem.book_id).where(OrderItem.order_id == order_id).distinct()).all()
+
+
+async def invalidate_stock(book_ids):
+    """Drop cached catalog reads showing the stock of ``book_ids``; call after the commit."""
+    if book_ids:
+        await catalog_cache.invalidate("books", *(f"book:{book_id}" for book_id in sorted(set(book_ids))))
+
+
+def _shortages(session, quantities: dict):
+    rows = session.execute(select(Book.id, Book.stock, Book.is_active).where(Book.id.in_(quantities))).all()
+    available = {book_id: (stock or 0) if is_active else 0 for book_id, stock, is_active in rows}
+    return sorted(book_id for book_id, quantity in quantities.items() if available.get(book_id, 0) < quantity)
+
+
+def _order_for_key(session, user_id: int, idempotency_key: str):
+    return session.scalar(select(Order.id).where(Order.user_id == user_id, Order.idempotency_key == idempotency_key))
+
+
+def place_order(session, user_id: int, quantities: dict = None, idempotency_key: str = None):
+    """Reserve stock and record a pending order in one short transaction.
+
+    Without ``quantities`` the user's cart is checked out and emptied.
+    Returns ``(order_id, created)``; a key that was already used returns the
+    order it created. Two requests racing with the same key both reserve,
+    but the unique ``(user_id, idempotency_key)`` rejects the second insert
+    and its rollback puts its stock back. The payment provider is never
+    called in here, so the book rows stay locked only for a few statements.
+    """
+    if idempotency_key:
+        existing = _order_for_key(session, user_id, idempotency_key)
+        if existing is not None:
+            return existing, False
+    from_cart = quantities is None
+    if from_cart:
+        quantities = dict(session.execute(
+            select(CartItem.book_id, CartItem.quantity).where(CartItem.user_id == user_id)
+        ).all())
+        if not quantities:
+            raise OrderError("Your cart is empty")
+    try:
+        if not reserve_stock(session, quantities):
+            session.rollback()
+            raise OutOfStock(_shortages(session, quantities))
+        prices = dict(session.execute(select(Book.id, Book.price).where(Book.id.in_(quantities))).all())
+        lines = [(book_id, quantity, round(prices[book_id] * 100)) for book_id, quantity in sorted(quantities.items())]
+        order = Order(
+            user_id=user_id,
+            status=PENDING_PAYMENT,
+            total_cents=sum(quantity * price for _, quantity, price in lines),
+            currency=Setting.ORDER_CURRENCY,
+            idempotency_key=idempotency_key,
+            reserved_until=datetime.utcnow() + timedelta(seconds=Setting.ORDER_RESERVATION_SECONDS),
+        )
+        session.add(order)
+        session.flush()
+        session.add_all([
+            OrderItem(order_id=order.id, book_id=book_id, quantity=quantity, unit_price_cents=price)
+            for book_id, quantity, price in lines
+        ])
+        if from_cart:
+            session.execute(delete(CartItem).where(CartItem.user_id == user_id))
+        session.commit()
+        return order.id, True
+    except IntegrityError:
+        session.rollback()
+        existing = _order_for_key(session, user_id, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing, False
+    except Exception:
+        session.rollback()
+        raise
+
+
+def attach_intent(session, order_id: int, intent_id: str):
+    session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.payment_intent_id.is_(None))
+        .values(payment_intent_id=intent_id)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def _transition(session, order_id: int, from_status: str, **values) -> bool:
+    result = session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == from_status)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
+
+
+def mark_paid(session, order_id: int) -> str:
+    """Record a successful payment; returns the order's status afterwards."""
+    paid = _transition(session, order_id, PENDING_PAYMENT, status=PAID, paid_at=datetime.utcnow())
+    session.commit()
+    return PAID if paid else session.scalar(select(Order.status).where(Order.id == order_id))
+
+
+def mark_refunded(session, order_id: int, from_status: str) -> str:
+    _transition(session, order_id, from_status, status=REFUNDED)
+    session.commit()
+    return session.scalar(select(Order.status).where(Order.id == order_id))
+
+
+def mark_fulfilled(session, order_id: int) -> bool:
+    fulfilled = _transition(session, order_id, PAID, status=FULFILLED, fulfilled_at=datetime.utcnow())
+    session.commit()
+    return fulfilled
+
+
+def release_order(session, order_id: int, to_status: str, user_id: int = None) -> bool:
+    """Move a pending order to ``to_status`` and put its stock back, exactly once.
+
+    The conditional status change decides the winner when a cancel, the
+    expiry sweep in any worker and a payment race for the same order.
+    """
+    stmt = update(Order).where(Order.id == order_id, Order.status == PENDING_PAYMENT)
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    result = session.execute(stmt.values(status=to_status).execution_options(synchronize_session=False))
+    if not result.rowcount:
+        session.rollback()
+        return False
+    restock(session, order_id)
+    session.commit()
+    return True
+
+
+def _with_items(session, orders):
+    if not orders:
+        return orders
+    by_id = {order["id"]: order for order in orders}
+    for order in orders:
+        order["total"] = order.pop("total_cents") / 100
+        order["items"] = []
+    rows = session.execute(
+        select(OrderItem.order_id, OrderItem.book_id, Book.title, OrderItem.quantity, OrderItem.unit_price_cents)
+        .join(Book, Book.id == OrderItem.book_id)
+        .where(OrderItem.order_id.in_(by_id))
+        .order_by(OrderItem.id)
+    ).all()
+    for order_id, book_id, title, quantity, unit_price_cents in rows:
+        by_id[order_id]["items"].append(
+            {"book_id": book_id, "title": title, "quantity": quantity, "unit_price": unit_price_cents / 100}
+        )
+    return orders
+
+
+def order_view(session, order_id: int, user_id: int = None):
+    stmt = select(*ORDER_COLUMNS).where(Order.id == order_id)
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    row = session.execute(stmt).mappings().first()
+    return _with_items(session, [dict(row)])[0] if row else None
+
+
+def order_page(session, filters, sort=None, cursor=None, limit=None):
+    rows = session.execute(ORDER_KEYSET.apply(select(*ORDER_COLUMNS).where(*filters), sort, cursor, limit))
+    orders, meta = ORDER_KEYSET.page(rows.mappings(), sort, limit)
+    return _with_items(session, orders), meta
+
+
+def order_for_intent(session, intent_id: str):
+    return session.scalar(select(Order.id).where(Order.payment_intent_id == intent_id))
+
+
+async def ensure_payment_intent(db, order_id: int):
+    """The order's payment intent, created at the provider on first use.
+
+    The provider's idempotency key is derived from the order, so a retry
+    after a lost response gets the same intent back rather than a second one.
+    """
+    row = (await db.execute(
+        select(Order.total_cents, Order.currency, Order.payment_intent_id).where(Order.id == order_id)
+    )).one()
+    gateway = payment_gateway()
+    if row.payment_intent_id:
+        return await gateway.retrieve_intent(row.payment_intent_id)
+    intent = await gateway.create_intent(
+        row.total_cents, row.currency, idempotency_key=f"order-{order_id}", metadata={"order_id": str(order_id)}
+    )
+    await db.run_sync(attach_intent, order_id, intent.id)
+    return intent
+
+
+async def settle_payment(db, order_id: int, intent_id: str) -> str:
+    """Mark the order paid. A payment that lands after the reservation lapsed is refunded."""
+    status = await db.run_sync(mark_paid, order_id)
+    if status in (EXPIRED, CANCELLED):
+        await payment_gateway().refund(intent_id)
+        status = await db.run_sync(mark_refunded, order_id, status)
+    return status
+
+
+async def cancel_intent(intent_id: str):
+    """Best effort: an abandoned intent also expires at the provider on its own."""
+    if not intent_id:
+        return
+    try:
+        await payment_gateway().cancel_intent(intent_id)
+    except PaymentError as e:
+        print(f"Could not cancel payment intent {intent_id}: {e}")
+
+
+def expire_reservations(limit: int = 100):
+    """Release pending orders whose reservation ran out.
+
+    Returns ``(intent_ids, book_ids)``: the payment intents to cancel and the
+    books whose stock went back up.
+    """
+    now = datetime.utcnow()
+    released = []
+    book_ids = set()
+    with SessionLocal() as session:
+        due = session.execute(
+            select(Order.id, Order.payment_intent_id)
+            .where(Order.status == PENDING_PAYMENT, Order.reserved_until <= now)
+            .order_by(Order.reserved_until)
+            .limit(limit)
+        ).all()
+        for order_id, intent_id in due:
+            if release_order(session, order_id, EXPIRED):
+                released.append(intent_id)
+                book_ids.update(order_book_ids(session, order_id))
+    return released, book_ids
+
+
+async def run_order_expiry():
+    while True:
+        await asyncio.sleep(Setting.ORDER_EXPIRY_INTERVAL_SECONDS)
+        try:
+            released, book_ids = await run_in_threadpool(expire_reservations)
+            await invalidate_stock(book_ids)
+            for intent_id in released:
+                await cancel_intent(intent_id)
+            if released:
+                print("Order expiry: released", len(released), "reservations")
+        except Exception as e:
+            print("Order expiry failed:", str(e))
+
+
+def start_order_expiry():
+    return asyncio.create_task(run_order_expiry())
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import Setting
+
+SUCCEEDED = "succeeded"
+REQUIRES_PAYMENT_METHOD = "requires_payment_method"
+CANCELED = "canceled"
+
+
+@dataclass(frozen=True)
+class PaymentIntent:
+    id: str
+    status: str
+    amount: int
+    currency: str
+    client_secret: Optional[str] = None
+
+
+class PaymentError(Exception):
+    """The provider failed or refused the call; the order is left as it was."""
+
+
+class PaymentDeclined(PaymentError):
+    """The payment method was declined. The intent can be confirmed again with another one."""
+
+
+class PaymentGateway:
+    """The calls the order flow makes to the payment provider. Amounts are in minor units."""
+
+    async def create_intent(self, amount: int, currency: str, idempotency_key: str, metadata: dict) -> PaymentIntent:
+        raise NotImplementedError
+
+    async def retrieve_intent(self, intent_id: str) -> PaymentIntent:
+        raise NotImplementedError
+
+    async def confirm_intent(self, intent_id: str, payment_method: str) -> PaymentIntent:
+        raise NotImplementedError
+
+    async def cancel_intent(self, intent_id: str):
+        raise NotImplementedError
+
+    async def refund(self, intent_id: str):
+        raise NotImplementedError
+
+    def parse_webhook(self, payload: bytes, signature: Optional[str]) -> dict:
+        """Verify and decode a webhook delivery; raises ``PaymentError`` if it is not genuine."""
+        raise NotImplementedError
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe through the official client. Its calls block, so they run in the threadpool."""
+
+    def __init__(self, secret_key: str, webhook_secret: Optional[str] = None):
+        self.secret_key = secret_key
+        self.webhook_secret = webhook_secret
+
+    async def _call(self, fn, *args, **kwargs):
+        import stripe
+        try:
+            return await run_in_threadpool(fn, *args, api_key=self.secret_key, **kwargs)
+        except stripe.error.CardError as e:
+            raise PaymentDeclined(e.user_message or str(e)) from e
+        except stripe.error.StripeError as e:
+            raise PaymentError(e.user_message or str(e)) from e
+
+    @staticmethod
+    def _intent(obj) -> PaymentIntent:
+        return PaymentIntent(obj["id"], obj["status"], obj["amount"], obj["currency"], obj.get("client_secret"))
+
+    async def create_intent(self, amount, currency, idempotency_key, metadata):
+        import stripe
+        return self._intent(await self._call(
+            stripe.PaymentIntent.create,
+            amount=amount,
+            currency=currency,
+            metadata=metadata,
+            # Confirmed server-side with a payment method id, so no redirect-based methods
+            automatic_payment_methods={"enabled": True, "allow_redirects": "never"},
+            idempotency_key=idempotency_key,
+        ))
+
+    async def retrieve_intent(self, intent_id):
+        import stripe
+        return self._intent(await self._call(stripe.PaymentIntent.retrieve, intent_id))
+
+    async def confirm_intent(self, intent_id, payment_method):
+        import stripe
+        return self._intent(await self._call(stripe.PaymentIntent.confirm, intent_id, payment_method=payment_method))
+
+    async def cancel_intent(self, intent_id):
+        import stripe
+        await self._call(stripe.PaymentIntent.cancel, intent_id)
+
+    async def refund(self, intent_id):
+        import stripe
+        await self._call(stripe.Refund.create, payment_intent=intent_id, idempotency_key=f"refund-{intent_id}")
+
+    def parse_webhook(self, payload, signature):
+        import stripe
+        if not self.webhook_secret:
+            raise PaymentError("STRIPE_WEBHOOK_SECRET is not configured")
+        try:
+            return stripe.Webhook.construct_event(payload, signature, self.webhook_secret)
+        except (ValueError, stripe.error.SignatureVerificationError) as e:
+            raise PaymentError(str(e)) from e
+
+
+class FakePaymentGateway(PaymentGateway):
+    """In-process stand-in following Stripe's semantics for the calls above.
+
+    For development and offline load tests. Accepts Stripe's test payment
+    methods: ``pm_card_chargeDeclined`` is declined, anything else succeeds.
+    ``latency_ms`` simulates the provider round trip. Intents are kept per
+    process, but an id minted by another worker is still accepted, since it
+    carries its own amount and currency.
+    """
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+        self._intents = {}
+        self._by_key = {}
+        self.refunded = set()
+
+    async def _round_trip(self):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def _get(self, intent_id: str) -> PaymentIntent:
+        intent = self._intents.get(intent_id)
+        if intent is None:
+            try:
+                _, _, amount, currency, _ = intent_id.split("_")
+                intent = PaymentIntent(intent_id, REQUIRES_PAYMENT_METHOD, int(amount), currency, f"{intent_id}_secret")
+            except ValueError:
+                raise PaymentError(f"No such payment_intent: '{intent_id}'")
+            self._intents[intent_id] = intent
+        return intent
+
+    def _set(self, intent: PaymentIntent) -> PaymentIntent:
+        self._intents[intent.id] = intent
+        return intent
+
+    async def create_intent(self, amount, currency, idempotency_key, metadata):
+        await self._round_trip()
+        if idempotency_key in self._by_key:
+            return self._get(self._by_key[idempotency_key])
+        intent_id = f"pi_fake_{amount}_{currency}_{uuid.uuid4().hex[:16]}"
+        self._by_key[idempotency_key] = intent_id
+        return self._set(PaymentIntent(intent_id, REQUIRES_PAYMENT_METHOD, amount, currency, f"{intent_id}_secret"))
+
+    async def retrieve_intent(self, intent_id):
+        await self._round_trip()
+        return self._get(intent_id)
+
+    async def confirm_intent(self, intent_id, payment_method):
+        await self._round_trip()
+        intent = self._get(intent_id)
+        if intent.status != REQUIRES_PAYMENT_METHOD:
+            raise PaymentError(f"This PaymentIntent's status is {intent.status}")
+        if payment_method == "pm_card_chargeDeclined":
+            raise PaymentDeclined("Your card was declined.")
+        return self._set(replace(intent, status=SUCCEEDED))
+
+    async def cancel_intent(self, intent_id):
+        await self._round_trip()
+        intent = self._get(intent_id)
+        if intent.status == SUCCEEDED:
+            raise PaymentError("You cannot cancel this PaymentIntent because it has a status of succeeded")
+        self._set(replace(intent, status=CANCELED))
+
+    async def refund(self, intent_id):
+        await self._round_trip()
+        if self._get(intent_id).status != SUCCEEDED:
+            raise PaymentError("This PaymentIntent does not have a successful charge to refund")
+        self.refunded.add(intent_id)
+
+    def parse_webhook(self, payload, signature):
+        try:
+            return json.loads(payload)
+        except ValueError as e:
+            raise PaymentError(str(e)) from e
+
+
+def _gateway() -> PaymentGateway:
+    if Setting.PAYMENT_BACKEND == "fake":
+        return FakePaymentGateway(Setting.PAYMENT_FAKE_LATENCY_MS)
+    return StripeGateway(Setting.STRIPE_SECRET_KEY, Setting.STRIPE_WEBHOOK_SECRET)
+
+
+_gateway_instance = None
+
+
+def payment_gateway() -> PaymentGateway:
+    """The configured gateway, built on first use."""
+    global _gateway_instance
+    if _gateway_instance is None:
+        _gateway_instance = _gateway()
+    return _gateway_instance
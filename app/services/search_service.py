@@ -0,0 +1,140 @@
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, Text, column, delete, func, insert, literal_column, select, table, text, true
+from sqlalchemy.dialects.mysql import match
+from app.db.session import engine
+from app.models.author_model import Author
+from app.models.book_model import Book
+from app.models.genre_model import Genre
+from app.services.catalog_service import LIST_COLUMNS, catalog_query
+
+SEARCH_BACKEND = {"mysql": "fulltext", "sqlite": "fts5"}.get(engine.dialect.name)
+SEARCH_COLUMNS = ("title", "description", "author_name", "genre_name")
+SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Relative weight of a hit in each column, in SEARCH_COLUMNS order
+FTS5_WEIGHTS = (4.0, 1.0, 2.0, 1.0)
+
+# MySQL keeps a denormalised copy of the searchable text, since a FULLTEXT
+# index cannot span the books/authors/genres join. It lives outside
+# Base.metadata so create_all never builds it on other databases.
+search_metadata = MetaData()
+book_search = Table(
+    "book_search",
+    search_metadata,
+    Column("book_id", Integer, primary_key=True, autoincrement=False),
+    Column("title", String(100)),
+    Column("description", Text),
+    Column("author_name", String(100)),
+    Column("genre_name", String(100)),
+    Index("ft_book_search", *SEARCH_COLUMNS, mysql_prefix="FULLTEXT"),
+    Index("ft_book_search_title", "title", mysql_prefix="FULLTEXT"),
+    mysql_engine="InnoDB",
+)
+
+# SQLite uses an FTS5 virtual table whose rowid is the book id
+book_search_fts = table("book_search_fts", column("rowid"), *(column(name) for name in SEARCH_COLUMNS))
+FTS5_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_search_fts "
+    f"USING fts5({', '.join(SEARCH_COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+)
+
+
+def _target():
+    if SEARCH_BACKEND == "fulltext":
+        return book_search, book_search.c.book_id
+    return book_search_fts, book_search_fts.c.rowid
+
+
+def _source(where):
+    return catalog_query(Book.id, Book.title, Book.description, Author.full_name, Genre.name).where(where)
+
+
+def _refresh_statements(where):
+    target, key = _target()
+    yield delete(target).where(key.in_(select(Book.id).where(where)))
+    yield insert(target).from_select([key.name, *SEARCH_COLUMNS], _source(where))
+
+
+def ensure_search_index(bind=engine):
+    """Create the search index if it is missing and backfill it from ``books`` when empty."""
+    if SEARCH_BACKEND is None:
+        return
+    with bind.begin() as conn:
+        if SEARCH_BACKEND == "fulltext":
+            book_search.create(conn, checkfirst=True)
+        else:
+            conn.execute(text(FTS5_DDL))
+        target, key = _target()
+        if conn.execute(select(key).select_from(target).limit(1)).first() is not None:
+            return
+        for statement in _refresh_statements(true()):
+            conn.execute(statement)
+
+
+async def index_books(db, where):
+    """Rewrite the index entries of the books matching ``where``.
+
+    Runs inside the caller's transaction, so flush pending changes first and
+    the index commits or rolls back together with them.
+    """
+    if SEARCH_BACKEND is None:
+        return
+    for statement in _refresh_statements(where):
+        await db.execute(statement)
+
+
+async def unindex_books(db, book_ids):
+    if SEARCH_BACKEND is None or not book_ids:
+        return
+    target, key = _target()
+    await db.execute(delete(target).where(key.in_(book_ids)))
+
+
+def _ranked(terms: str):
+    """``(book_id, score)`` rows matching ``terms``, best first."""
+    if SEARCH_BACKEND == "fulltext":
+        columns = [book_search.c[name] for name in SEARCH_COLUMNS]
+        matched = match(*columns, against=terms).in_natural_language_mode()
+        # Title hits count double on top of the all-columns relevance
+        score = matched + match(book_search.c.title, against=terms).in_natural_language_mode() * 2
+        return select(book_search.c.book_id.label("book_id"), score.label("score")).where(matched), book_search.c.book_id
+
+    tokens = SEARCH_TOKEN.findall(terms)
+    # Quote every token so user input can never be parsed as FTS5 syntax; "tok"* also matches prefixes
+    query = " ".join(f'"{token}"*' for token in tokens)
+    fts = literal_column("book_search_fts")
+    # bm25() is lower-is-better; negate it so both backends sort by score descending
+    score = -func.bm25(fts, *FTS5_WEIGHTS)
+    stmt = select(book_search_fts.c.rowid.label("book_id"), score.label("score")).select_from(book_search_fts)
+    return stmt.where(fts.op("MATCH")(query)), book_search_fts.c.rowid
+
+
+async def search_books(db, terms: str, limit: int, offset: int = 0):
+    """Active books matching ``terms`` ranked by relevance, with list columns and a ``score``.
+
+    Returns up to ``limit + 1`` rows so callers can tell whether another page exists.
+    """
+    if SEARCH_BACKEND is None:
+        raise HTTPException(
+            status_code=501,
+            detail={"success": False, "message": "Search is not available on this database", "data": {}}
+        )
+    if not SEARCH_TOKEN.search(terms or ""):
+        raise HTTPException(status_code=400, detail={"success": False, "message": "Search query is empty", "data": {}})
+
+    stmt, key = _ranked(terms)
+    ranked = (
+        stmt.join(Book, Book.id == key)
+        .where(Book.is_active.is_(True))
+        .order_by(literal_column("score").desc(), key)
+        .limit(limit + 1)
+        .offset(offset)
+        .subquery()
+    )
+    rows = await db.execute(
+        catalog_query(*LIST_COLUMNS, ranked.c.score)
+        .join(ranked, ranked.c.book_id == Book.id)
+        .order_by(ranked.c.score.desc(), Book.id)
+    )
+    return [dict(row) for row in rows.mappings()]
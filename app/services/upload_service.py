@@ -0,0 +1,106 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.core.config import Setting
+from app.core.metrics import request_metrics
+from app.core.timing import timed
+
+# Sniffed from the first bytes; the client's Content-Type and file name are not trusted
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+)
+
+
+@dataclass(frozen=True)
+class PendingUpload:
+    """A validated upload sitting in a temp file, not yet moved into place."""
+    temp_path: str
+    size: int
+    sha256: str
+    content_type: str
+    ext: str
+
+
+UPLOAD_LIMITS = {
+    "profile": Setting.PROFILE_IMAGE_MAX_BYTES,
+    "author": Setting.AUTHOR_IMAGE_MAX_BYTES,
+    "book": Setting.BOOK_IMAGE_MAX_BYTES,
+}
+# Temp files share a filesystem with the blob store, so moving one into place is a rename
+UPLOAD_TEMP_DIR = "uploads/blobs/.tmp"
+
+
+def _reject(status_code: int, message: str):
+    return HTTPException(status_code=status_code, detail={"success": False, "message": message, "data": {}})
+
+
+def sniff_image(head: bytes):
+    """``(content_type, extension)`` of a JPEG, PNG, GIF or WebP header, else ``None``."""
+    for signature, content_type, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    return os.fdopen(fd, "wb"), path
+
+
+def _write(target, digest, chunk: bytes):
+    digest.update(chunk)
+    target.write(chunk)
+
+
+def _discard(target, path: str):
+    target.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def receive_upload(upload: UploadFile, kind: str) -> PendingUpload:
+    """Stream an uploaded image to a temp file, hashing and validating it on the way.
+
+    The body is copied in ``UPLOAD_CHUNK_SIZE`` pieces. The size cap is
+    checked per chunk and the type from the first one, so a bad upload is
+    rejected before it is written out, and a rejected or interrupted upload
+    leaves no file behind. All file I/O runs in the threadpool.
+    """
+    with timed("upload"):
+        max_bytes = UPLOAD_LIMITS[kind]
+        target, temp_path = await run_in_threadpool(_open_temp, UPLOAD_TEMP_DIR)
+        digest = hashlib.sha256()
+        size = 0
+        detected = None
+        try:
+            while True:
+                chunk = await upload.read(Setting.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if detected is None:
+                    detected = sniff_image(chunk)
+                    if detected is None:
+                        raise _reject(415, "Unsupported file type. Upload a JPEG, PNG, GIF or WebP image")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _reject(413, f"File too large. The limit is {max_bytes // (1024 * 1024)} MB")
+                await run_in_threadpool(_write, target, digest, chunk)
+            if detected is None:
+                raise _reject(400, "Uploaded file is empty")
+            await run_in_threadpool(target.close)
+        except BaseException:
+            await run_in_threadpool(_discard, target, temp_path)
+            raise
+        content_type, ext = detected
+    request_metrics.observe_upload(kind, size)
+    return PendingUpload(temp_path, size, digest.hexdigest(), content_type, ext)
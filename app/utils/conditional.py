@@ -0,0 +1,72 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from app.core.config import Setting
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over the row versions a representation was built from."""
+    digest = hashlib.sha1("|".join("" if part is None else str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def query_key(request: Request) -> str:
+    """Query string with parameters sorted, so equivalent URLs share a validator."""
+    return "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+def latest(*stamps):
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def _http_date(value: datetime) -> str:
+    # Timestamps are stored as naive UTC (datetime.utcnow)
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 8.8.3.2): opaque tags equal regardless of W/
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def conditional_get(request: Request, etag: str, last_modified: datetime = None):
+    """Answer a conditional GET from validators alone.
+
+    Returns ``(response, headers)``: a bare 304 when the client's copy is
+    current, so the handler can skip the real query and serialization, else
+    ``None``. ``headers`` carries the validators and ``Cache-Control`` to put
+    on the full response.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={Setting.CATALOG_MAX_AGE}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present
+        fresh = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_modified is not None:
+        fresh = _not_modified_since(if_modified_since, last_modified)
+    else:
+        fresh = False
+    return (Response(status_code=304, headers=headers) if fresh else None), headers
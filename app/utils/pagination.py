@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, tuple_
+from app.core.config import Setting
+
+CURSOR_KEY = "_cursor"
+
+
+def _bad_request(message: str):
+    return HTTPException(status_code=400, detail={"success": False, "message": message, "data": {}})
+
+
+def page_limit(limit) -> int:
+    if limit is None:
+        return Setting.PAGE_SIZE_DEFAULT
+    return max(1, min(limit, Setting.PAGE_SIZE_MAX))
+
+
+class Keyset:
+    """Keyset (seek) pagination over a fixed set of sort orders.
+
+    Every sort order is ``(column, id)`` so it is total and stable under
+    concurrent inserts, and each one should be backed by a matching composite
+    index. Cursors are opaque base64 tokens carrying the sort name and the last
+    row's ``(column, id)`` values.
+    """
+
+    def __init__(self, id_column, sorts: dict, default: str):
+        self.id_column = id_column
+        self.sorts = sorts
+        self.default = default
+
+    def _resolve(self, sort):
+        sort = sort or self.default
+        name = sort.lstrip("-")
+        if name not in self.sorts:
+            raise _bad_request(f"Unsupported sort '{sort}'. Use one of: {', '.join(sorted(self.sorts))}")
+        return sort, self.sorts[name], sort.startswith("-")
+
+    def _decode(self, cursor: str, sort: str, column):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode() + b"=" * (-len(cursor) % 4)))
+            value, last_id = payload["v"]
+        except Exception:
+            raise _bad_request("Invalid cursor")
+        if payload.get("s") != sort:
+            raise _bad_request("Cursor does not match the requested sort")
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, last_id
+
+    def apply(self, stmt, sort=None, cursor=None, limit=None):
+        """Add ordering, the seek predicate and ``LIMIT limit + 1`` to ``stmt``."""
+        sort, column, descending = self._resolve(sort)
+        stmt = stmt.add_columns(column.label(CURSOR_KEY))
+        if cursor:
+            value, last_id = self._decode(cursor, sort, column)
+            key = tuple_(column, self.id_column)
+            stmt = stmt.where(key < tuple_(value, last_id) if descending else key > tuple_(value, last_id))
+        if descending:
+            stmt = stmt.order_by(column.desc(), self.id_column.desc())
+        else:
+            stmt = stmt.order_by(column.asc(), self.id_column.asc())
+        return stmt.limit(page_limit(limit) + 1)
+
+    def page(self, rows, sort=None, limit=None):
+        """Split fetched mappings into ``(items, meta)`` with the next cursor."""
+        sort = sort or self.default
+        limit = page_limit(limit)
+        items = [dict(row) for row in rows]
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            value = last[CURSOR_KEY]
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            payload = json.dumps({"s": sort, "v": [value, last["id"]]}, separators=(",", ":"))
+            next_cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        for item in items:
+            item.pop(CURSOR_KEY, None)
+        return items, {"next_cursor": next_cursor, "limit": limit, "sort": sort}
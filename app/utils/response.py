@@ -1,11 +1,19 @@
 from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from app.core.timing import timed
 
-def success_response(message: str, data=None):
-    return {
+def success_response(message: str, data=None, meta=None, headers=None):
+    # Rendered here with orjson: returning a Response skips FastAPI's jsonable_encoder
+    # walk and response_model validation, which only documents the envelope
+    response = {
         "success": True,
         "message": message,
-        "data": data or {}
+        "data": {} if data is None else data
     }
+    if meta is not None:
+        response["meta"] = meta
+    with timed("render"):
+        return ORJSONResponse(response, headers=headers)
 
 def error_message(status_code: int, message:str):
     raise HTTPException(
@@ -15,4 +23,4 @@ def error_message(status_code: int, message:str):
             "message": message,
             "data": {}
         }
-    )
\ No newline at end of file
+    )
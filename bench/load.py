@@ -0,0 +1,428 @@
+"""Load benchmark for the API against a file-backed SQLite database.
+
+Boots the app under uvicorn in a scratch directory, with mail going to the
+console backend. It seeds a catalog, then drives a weighted mix of routes
+from concurrent clients and reports throughput and p50/p95/p99 latency per
+route. Runs are reproducible for a given --seed. Results can be saved as a
+baseline, and a later run compared against it fails (exit 1) when a route's
+p95 or throughput regresses past --threshold.
+
+    python -m bench.load --duration 30 --concurrency 32 --save bench/baseline.json
+    python -m bench.load --duration 30 --concurrency 32 --compare bench/baseline.json
+    python -m bench.load --mix flash-sale --concurrency 64
+
+The flash-sale mix checks out and pays for a handful of titles that every
+client competes for, through the fake payment backend, to measure order
+throughput under hot-row contention. --hot-stock bounds how many copies are
+for sale; once they run out, checkouts fail with 409 and count as errors.
+
+Needs httpx (pip install httpx) in addition to requirements.txt.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN = {"email": "admin@example.com", "password": "admin123"}
+USER_PASSWORD = "bench-password"
+
+# Relative weights of each route in the default mix; override with --mix name=weight,...
+DEFAULT_MIX = {
+    "POST /auth/login": 2,
+    "GET /auth/me": 15,
+    "GET /admin/books": 20,
+    "GET /admin/books/{id}": 20,
+    "GET /admin/authors": 8,
+    "GET /admin/authors/{id}": 8,
+    "GET /admin/genres": 5,
+    "GET /admin/genres/{id}": 5,
+    "GET /books/search": 8,
+    "POST /admin/books": 3,
+    "PUT /admin/books/{id}": 3,
+}
+# Checkout and payment against the hot titles, with some catalog reads alongside
+FLASH_SALE_MIX = {
+    "POST /orders (hot title)": 6,
+    "POST /orders (3 titles)": 2,
+    "POST /orders/{id}/pay": 5,
+    "GET /admin/books/{id}": 4,
+}
+MIXES = {"default": DEFAULT_MIX, "flash-sale": FLASH_SALE_MIX}
+ROUTES = {label for mix in MIXES.values() for label in mix}
+# Book ids 1..HOT_TITLES are active and stocked with --hot-stock copies; 1 is the hottest
+HOT_TITLES = 10
+SEARCH_WORDS = ("river", "night", "garden", "winter", "empire", "stone", "glass", "harbor", "silent", "crown")
+# Routes with fewer samples than this are too noisy to gate on
+MIN_SAMPLES = 50
+
+
+def server_env(workdir: str, args) -> dict:
+    env = dict(os.environ)
+    env.update(
+        PYTHONPATH=ROOT,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        SECRET_KEY="bench-secret",
+        ALGORITHM="HS256",
+        ACCESS_TOKEN_EXPIRE_MINUTES="600",
+        APP_URL="http://localhost",
+        MAIL_BACKEND="console",
+        MAIL_FROM="bench@example.com",
+        DB_INIT_ON_STARTUP="false",
+        SEED_ADMIN_ON_STARTUP="false",
+        DB_ASYNC="true" if args.db_async else "false",
+        # Every bench client shares one address; the limits would cap logins, not measure them
+        RATE_LIMIT_ENABLED="false",
+        PAYMENT_BACKEND="fake",
+        PAYMENT_FAKE_LATENCY_MS=str(args.payment_latency_ms),
+    )
+    if args.db_async:
+        env["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    return env
+
+
+SEED_SCRIPT = """
+import random, sys
+from sqlalchemy import insert, update
+from app.cli import init_db, seed_admin
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.models.author_model import Author
+from app.models.book_model import Book
+from app.models.genre_model import Genre
+from app.models.user_model import User
+from app.services.search_service import ensure_search_index
+
+books, authors, genres, users, seed, password, hot_titles, hot_stock = sys.argv[1:]
+books, authors, genres, users = int(books), int(authors), int(genres), int(users)
+rng = random.Random(int(seed))
+words = %r
+init_db()
+seed_admin()
+
+def phrase(count):
+    return " ".join(rng.choice(words) for _ in range(count))
+
+with SessionLocal() as session:
+    session.execute(insert(Genre), [{"name": f"Genre {i}", "description": phrase(6)} for i in range(genres)])
+    session.execute(insert(Author), [{"full_name": f"Author {i} {phrase(1)}", "biography": phrase(40)} for i in range(authors)])
+    session.execute(insert(Book), [{
+        "title": f"{phrase(3).title()} {i}",
+        "author_id": rng.randint(1, authors),
+        "genre_id": rng.randint(1, genres),
+        "price": round(rng.uniform(3, 60), 2),
+        "stock": rng.randint(0, 200),
+        "description": phrase(80),
+        "is_active": rng.random() > 0.05,
+    } for i in range(books)])
+    # One bcrypt hash shared by every user keeps seeding fast
+    hashed = get_password_hash(password)
+    session.execute(insert(User), [{
+        "full_name": f"User {i}", "email": f"user{i}@bench.example.com", "password": hashed, "is_verified": True,
+    } for i in range(users)])
+    session.execute(
+        update(Book).where(Book.id <= int(hot_titles)).values(stock=int(hot_stock), is_active=True)
+    )
+    session.commit()
+ensure_search_index()
+""" % (SEARCH_WORDS,)
+
+
+def seed(workdir: str, env: dict, args):
+    subprocess.run(
+        [sys.executable, "-c", SEED_SCRIPT, str(args.books), str(args.authors), str(args.genres),
+         str(args.users), str(args.seed), USER_PASSWORD, str(HOT_TITLES), str(args.hot_stock)],
+        cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir: str, env: dict, port: int, workers: int):
+    log = open(os.path.join(workdir, "server.log"), "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "app.main:create_app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/openapi.json")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready; see server.log in the work directory")
+
+
+async def login(client, path: str, credentials: dict) -> dict:
+    response = await client.post(path, json=credentials)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+class Scenario:
+    """Builds one request for a route label from shared, seeded state."""
+
+    def __init__(self, args, admin: dict, users: list):
+        self.args = args
+        self.admin = admin
+        self.users = users
+        self.created = 0
+        self.checkouts = 0
+        # (headers, order id) of placed orders waiting to be paid
+        self.unpaid = []
+
+    def available(self, label: str) -> str:
+        # Nothing to pay for yet: place an order instead
+        if label == "POST /orders/{id}/pay" and not self.unpaid:
+            return "POST /orders (hot title)"
+        return label
+
+    def observe(self, label: str, options: dict, response):
+        if label.startswith("POST /orders (") and response.status_code == 200:
+            self.unpaid.append((options["headers"], response.json()["data"]["id"]))
+
+    def build(self, label: str, rng: random.Random):
+        args = self.args
+        book_id = rng.randint(1, args.books)
+        if label == "POST /auth/login":
+            user = rng.randrange(args.users)
+            return "POST", "/api/v1/auth/login", {"json": {"email": f"user{user}@bench.example.com", "password": USER_PASSWORD}}
+        if label == "GET /auth/me":
+            return "GET", "/api/v1/auth/me", {"headers": rng.choice(self.users)}
+        if label == "GET /admin/books":
+            params = {"limit": rng.choice((20, 50))}
+            if rng.random() < 0.5:
+                params["genre_id"] = rng.randint(1, args.genres)
+            if rng.random() < 0.3:
+                params["sort"] = rng.choice(("title", "-price", "-created_at"))
+            return "GET", "/api/v1/admin/books/", {"headers": self.admin, "params": params}
+        if label == "GET /admin/books/{id}":
+            return "GET", f"/api/v1/admin/books/{book_id}", {"headers": self.admin}
+        if label == "GET /admin/authors":
+            return "GET", "/api/v1/admin/authors/", {"headers": self.admin, "params": {"limit": 50}}
+        if label == "GET /admin/authors/{id}":
+            return "GET", f"/api/v1/admin/authors/{rng.randint(1, args.authors)}", {"headers": self.admin}
+        if label == "GET /admin/genres":
+            return "GET", "/api/v1/admin/genres/", {"headers": self.admin, "params": {"limit": 50}}
+        if label == "GET /admin/genres/{id}":
+            return "GET", f"/api/v1/admin/genres/{rng.randint(1, args.genres)}", {"headers": self.admin}
+        if label == "GET /books/search":
+            terms = " ".join(rng.sample(SEARCH_WORDS, 2))
+            return "GET", "/api/v1/books/search", {"headers": rng.choice(self.users), "params": {"q": terms, "limit": 20}}
+        if label in ("POST /admin/books", "PUT /admin/books/{id}"):
+            self.created += 1
+            form = {
+                "title": f"Bench {self.created}",
+                "author_id": str(rng.randint(1, args.authors)),
+                "genre_id": str(rng.randint(1, args.genres)),
+                "price": f"{rng.uniform(3, 60):.2f}",
+                "stock": str(rng.randint(0, 50)),
+                "description": " ".join(rng.choice(SEARCH_WORDS) for _ in range(30)),
+            }
+            if label == "POST /admin/books":
+                return "POST", "/api/v1/admin/books/", {"headers": self.admin, "data": form}
+            return "PUT", f"/api/v1/admin/books/{book_id}", {"headers": self.admin, "data": form}
+        if label in ("POST /orders (hot title)", "POST /orders (3 titles)"):
+            self.checkouts += 1
+            items = [{"book_id": 1, "quantity": 1}]
+            if label == "POST /orders (3 titles)":
+                items += [{"book_id": book, "quantity": 1} for book in rng.sample(range(2, HOT_TITLES + 1), 2)]
+            headers = {**rng.choice(self.users), "Idempotency-Key": f"bench-{self.checkouts}"}
+            return "POST", "/api/v1/orders/", {"headers": headers, "json": {"items": items}}
+        if label == "POST /orders/{id}/pay":
+            headers, order_id = self.unpaid.pop(rng.randrange(len(self.unpaid)))
+            return "POST", f"/api/v1/orders/{order_id}/pay", {"headers": headers, "json": {"payment_method": "pm_card_visa"}}
+        raise ValueError(f"Unknown route in mix: {label}")
+
+
+async def drive(client, scenario: Scenario, mix: dict, worker: int, seed_value: int, stop_at: float,
+                record_from: float, samples: dict):
+    rng = random.Random(seed_value * 1000 + worker)
+    labels, weights = list(mix), list(mix.values())
+    while True:
+        now = time.monotonic()
+        if now >= stop_at:
+            return
+        label = scenario.available(rng.choices(labels, weights)[0])
+        method, path, options = scenario.build(label, rng)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **options)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if status is not None:
+            scenario.observe(label, options, response)
+        if now >= record_from:
+            entry = samples.setdefault(label, {"latencies": [], "errors": 0})
+            entry["latencies"].append(elapsed_ms)
+            if status is None or status >= 400:
+                entry["errors"] += 1
+
+
+def percentile(ordered, fraction: float) -> float:
+    # Nearest-rank on a sorted list
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def summarize(samples: dict, duration: float) -> dict:
+    routes = {}
+    for label, entry in sorted(samples.items()):
+        ordered = sorted(entry["latencies"])
+        routes[label] = {
+            "count": len(ordered),
+            "errors": entry["errors"],
+            "rps": round(len(ordered) / duration, 2),
+            "p50_ms": round(percentile(ordered, 0.50), 2),
+            "p95_ms": round(percentile(ordered, 0.95), 2),
+            "p99_ms": round(percentile(ordered, 0.99), 2),
+        }
+    total = sum(route["count"] for route in routes.values())
+    return {"total_requests": total, "total_rps": round(total / duration, 2), "routes": routes}
+
+
+def print_report(summary: dict):
+    print(f"{'route':<28}{'count':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, route in summary["routes"].items():
+        print(f"{label:<28}{route['count']:>8}{route['errors']:>8}{route['rps']:>10}"
+              f"{route['p50_ms']:>10}{route['p95_ms']:>10}{route['p99_ms']:>10}")
+    print(f"{'total':<28}{summary['total_requests']:>8}{'':>8}{summary['total_rps']:>10}")
+
+
+def compare(summary: dict, baseline: dict, threshold: float) -> list:
+    """Regressions past ``threshold`` (a fraction) in p95 latency or throughput, per route."""
+    regressions = []
+    for label, base in baseline["routes"].items():
+        current = summary["routes"].get(label)
+        if current is None or min(current["count"], base["count"]) < MIN_SAMPLES:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{label}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{label}: throughput {base['rps']} -> {current['rps']} req/s")
+        if current["errors"] > base["errors"] * (1 + threshold) + 0.01 * current["count"]:
+            regressions.append(f"{label}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def parse_mix(text: str) -> dict:
+    if not text:
+        return dict(DEFAULT_MIX)
+    if text in MIXES:
+        return dict(MIXES[text])
+    mix = {}
+    for part in text.split(","):
+        label, _, weight = part.rpartition("=")
+        if label not in ROUTES:
+            raise SystemExit(f"Unknown route '{label}'. Routes: {', '.join(sorted(ROUTES))}")
+        mix[label] = float(weight)
+    return mix
+
+
+async def run(args, base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_ready(client)
+        admin = await login(client, "/api/v1/admin/auth/login", ADMIN)
+        users = [
+            await login(client, "/api/v1/auth/login", {"email": f"user{i}@bench.example.com", "password": USER_PASSWORD})
+            for i in range(min(args.users, 20))
+        ]
+        scenario = Scenario(args, admin, users)
+        samples = {}
+        start = time.monotonic()
+        record_from = start + args.warmup
+        stop_at = record_from + args.duration
+        await asyncio.gather(*(
+            drive(client, scenario, parse_mix(args.mix), worker, args.seed, stop_at, record_from, samples)
+            for worker in range(args.concurrency)
+        ))
+    return summarize(samples, args.duration)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--db-async", action="store_true", help="serve through the async engine (aiosqlite)")
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--genres", type=int, default=30)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mix", default="", help=f"a preset ({', '.join(MIXES)}) or comma-separated route=weight pairs")
+    parser.add_argument("--hot-stock", type=int, default=1_000_000, help="copies of each flash-sale title")
+    parser.add_argument("--payment-latency-ms", type=float, default=0, help="simulated payment provider round trip")
+    parser.add_argument("--save", help="write the results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed regression as a fraction")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="papyrus-bench-")
+    os.makedirs(os.path.join(workdir, "uploads"))
+    env = server_env(workdir, args)
+    print(f"Seeding {args.books} books, {args.authors} authors, {args.genres} genres, {args.users} users in {workdir}")
+    seed(workdir, env, args)
+    port = free_port()
+    server = start_server(workdir, env, port, args.workers)
+    try:
+        summary = asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    summary["config"] = {
+        key: getattr(args, key)
+        for key in ("duration", "concurrency", "workers", "db_async", "books", "authors", "genres", "users", "seed", "mix",
+                    "hot_stock", "payment_latency_ms")
+    }
+    summary["machine"] = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+    print_report(summary)
+
+    if args.save:
+        with open(args.save, "w") as handle:
+            json.dump(summary, handle, indent=2)
+        print("Baseline saved to", args.save)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if baseline.get("config") != summary["config"]:
+            print("WARNING: baseline was recorded with a different configuration:", baseline.get("config"))
+        regressions = compare(summary, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION:", regression)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Settings are read at import time, so the environment is set before the app is imported
+_data_dir = tempfile.mkdtemp(prefix="papyrus-tests-")
+# Uploads and other relative paths land in the temp directory, not the checkout
+os.chdir(_data_dir)
+for name, value in {
+    "DATABASE_URL": f"sqlite:///{_data_dir}/app.db",
+    "DB_INIT_ON_STARTUP": "true",
+    "SEED_ADMIN_ON_STARTUP": "true",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "APP_URL": "http://testserver",
+    "MAIL_USERNAME": "user",
+    "MAIL_PASSWORD": "password",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_PORT": "1025",
+    "MAIL_SERVER": "localhost",
+    "METRICS_DIR": f"{_data_dir}/metrics",
+    "METRICS_TOKEN": "test-metrics-token",
+    "PAYMENT_BACKEND": "fake",
+    "RATE_LIMIT_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import create_app
+    with TestClient(create_app()) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    # The admin created by app.db.seeders.seed_admin
+    response = client.post("/api/v1/admin/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": "Bearer " + response.json()["data"]["access_token"]}
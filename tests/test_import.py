@@ -0,0 +1,46 @@
+import time
+
+from app.services import import_service
+from app.services.import_service import ImportJob, import_jobs
+
+
+def _wait_for(client, admin_headers, job_id):
+    for _ in range(100):
+        job = client.get(f"/api/v1/admin/books/import/{job_id}", headers=admin_headers).json()["data"]
+        if job["status"] in import_service.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"import {job_id} did not finish")
+
+
+def test_dry_run_reports_would_insert(client, admin_headers):
+    feed = b'{"title": "Dry", "author": "Dry Author", "genre": "Dry Genre", "price": 3}\n{"title": "Bad"}\n'
+    response = client.post(
+        "/api/v1/admin/books/import",
+        data={"dry_run": "true"},
+        files={"file": ("books.jsonl", feed, "application/x-ndjson")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 202, response.text
+    job = _wait_for(client, admin_headers, response.json()["data"]["job_id"])
+    assert (job["status"], job["inserted"], job["would_insert"], job["failed"]) == ("completed", 0, 1, 1)
+
+
+def test_eviction_keeps_unfinished_jobs(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(import_service, "MAX_TRACKED_JOBS", 3)
+    monkeypatch.setattr(import_service, "import_jobs", import_jobs.__class__())
+    jobs = [ImportJob(f"{n}.csv", "csv", False) for n in range(3)]
+    jobs[1].status = "completed"
+    for job in jobs:
+        import_service.import_jobs[job.id] = job
+
+    import_service._evict_finished()
+    assert list(import_service.import_jobs) == [jobs[0].id, jobs[2].id]
+
+    import_service.import_jobs[jobs[1].id] = jobs[1]
+    jobs[1].status = "running"
+    response = client.post(
+        "/api/v1/admin/books/import", files={"file": ("books.csv", b"title\n", "text/csv")}, headers=admin_headers
+    )
+    assert response.status_code == 429, response.text
+    assert len(import_service.import_jobs) == 3
@@ -0,0 +1,40 @@
+import io
+
+from PIL import Image
+from sqlalchemy import insert
+
+from app.core.config import Setting
+from app.db.session import SessionLocal
+from app.models.author_model import Author
+from app.models.genre_model import Genre
+
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "white").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_metrics_after_image_upload(client, admin_headers):
+    with SessionLocal() as session:
+        author_id = session.execute(insert(Author).values(full_name="Metrics Author", biography="-")).inserted_primary_key[0]
+        genre_id = session.execute(insert(Genre).values(name="Metrics Genre", description="-")).inserted_primary_key[0]
+        session.commit()
+
+    response = client.post(
+        "/api/v1/admin/books/",
+        data={"title": "Metrics Book", "author_id": author_id, "genre_id": genre_id, "price": 5, "description": "-"},
+        files={"image": ("cover.png", _png(), "image/png")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {Setting.METRICS_TOKEN}"})
+    assert response.status_code == 200, response.text
+    assert 'papyrus_upload_bytes_total{kind="book"}' in response.text
+    assert 'papyrus_uploads_total{kind="book"} 1' in response.text
+
+
+def test_metrics_requires_token(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
@@ -0,0 +1,49 @@
+from sqlalchemy import insert
+
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.models.author_model import Author
+from app.models.book_model import Book
+from app.models.genre_model import Genre
+from app.models.user_model import User
+
+
+def _seed_book(stock: int) -> int:
+    with SessionLocal() as session:
+        author_id = session.execute(insert(Author).values(full_name="Order Author", biography="-")).inserted_primary_key[0]
+        genre_id = session.execute(insert(Genre).values(name="Order Genre", description="-")).inserted_primary_key[0]
+        book_id = session.execute(insert(Book).values(
+            title="Order Book", author_id=author_id, genre_id=genre_id, price=9.99, stock=stock, description="-"
+        )).inserted_primary_key[0]
+        session.commit()
+    return book_id
+
+
+def _user_headers(client, email: str):
+    with SessionLocal() as session:
+        session.execute(insert(User).values(full_name="Buyer", email=email, password=get_password_hash("pw"), is_verified=True))
+        session.commit()
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": "pw"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": "Bearer " + response.json()["data"]["access_token"]}
+
+
+def test_cached_book_shows_stock_after_checkout_and_cancel(client, admin_headers):
+    book_id = _seed_book(stock=2)
+    buyer = _user_headers(client, "stock-buyer@example.com")
+
+    def cached_stock():
+        response = client.get(f"/api/v1/admin/books/{book_id}", headers=admin_headers)
+        assert response.status_code == 200, response.text
+        return response.json()["data"]["stock"]
+
+    assert cached_stock() == 2
+    assert cached_stock() == 2
+
+    response = client.post("/api/v1/orders/", json={"items": [{"book_id": book_id, "quantity": 2}]}, headers=buyer)
+    assert response.status_code == 200, response.text
+    assert cached_stock() == 0
+
+    response = client.post(f"/api/v1/orders/{response.json()['data']['id']}/cancel", headers=buyer)
+    assert response.status_code == 200, response.text
+    assert cached_stock() == 2
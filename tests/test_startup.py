@@ -0,0 +1,8 @@
+from app.cli import check_startup
+from tests.conftest import REPO_ROOT
+
+
+def test_startup_within_budget(monkeypatch, capsys):
+    # The probe imports app.main in a fresh interpreter started from the working directory
+    monkeypatch.chdir(REPO_ROOT)
+    assert check_startup(import_budget_ms=500, create_budget_ms=1500, runs=3) == 0, capsys.readouterr().out